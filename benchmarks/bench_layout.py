@@ -0,0 +1,88 @@
+"""
+Benchmark of the shared text layout engine on multi-megabyte inputs.
+The layout time per megabyte stays constant (linear scaling), the legacy string concatenation loop
+of `decode_text´ is measured as reference with `--legacy´ (quadratic scaling, slow on large inputs).
+
+    python benchmarks/bench_layout.py --sizes 1 2 4 8 --legacy
+"""
+import os
+import sys
+import time
+import random
+import argparse
+from typing import List, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from language_decoder.dictionaries import PUNCTUATIONS  # noqa: E402
+from language_decoder.text_layout import write_decode_text, get_page_lines  # noqa: E402
+
+
+def generate_pairs(size_mb: float, seed: int = 0) -> List[Tuple[str, str]]:
+    # generate aligned word pairs with about size_mb megabytes of source text
+    rnd = random.Random(seed)
+    letters = 'абвгдеёжзийклмнопрстуфхцчшщъыьэюя'
+    pairs, size = list(), 0
+    while size < size_mb * 1e6:
+        source_word = ''.join(rnd.choices(letters, k = rnd.randint(1, 12)))
+        decode_word = ''.join(rnd.choices('abcdefghijklmnopqrstuvwxyz', k = rnd.randint(1, 14)))
+        if rnd.random() < 0.08:
+            source_word += rnd.choice(PUNCTUATIONS)
+        pairs.append((source_word, decode_word))
+        size += len(source_word.encode('utf-8')) + 1
+    return pairs
+
+
+def legacy_decode_text(pairs: List[Tuple[str, str]], char_lim: int, word_space: int = 4, new_line: str = '\n') -> str:
+    # the layout loop of `LanguageDecoder.decode_text´ before the shared layout engine
+    line_len = 0
+    source_line = ''
+    decode_line = ''
+    decode_text = ''
+    for source_word, decode_word in pairs:
+        word_len = len(max([source_word, decode_word], key = len)) + word_space
+        line_len += word_len
+        if (line_len - word_space) > char_lim:
+            source_line = f'{source_line[0:-word_space]}{new_line}'
+            decode_line = f'{decode_line[0:-word_space]}{new_line}'
+            decode_text = f'{decode_text}{source_line}{decode_line}{new_line}'
+            line_len = word_len
+            source_line = source_word.ljust(word_len, ' ')
+            decode_line = decode_word.ljust(word_len, ' ')
+        elif any(punctuation in source_word for punctuation in PUNCTUATIONS):
+            source_line = f'{source_line}{source_word}{new_line}'
+            decode_line = f'{decode_line}{decode_word}{new_line}'
+            decode_text = f'{decode_text}{source_line}{decode_line}{new_line}'
+            line_len = 0
+            source_line = ''
+            decode_line = ''
+        else:
+            source_line += source_word.ljust(word_len, ' ')
+            decode_line += decode_word.ljust(word_len, ' ')
+    return decode_text
+
+
+def measure(func, *args, **kwargs) -> float:
+    start = time.perf_counter()
+    func(*args, **kwargs)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description = 'Benchmark the text layout engine.')
+    parser.add_argument('--sizes', type = float, nargs = '+', default = [1., 2., 4., 8.], help = 'input sizes in MB')
+    parser.add_argument('--legacy', action = 'store_true', help = 'measure the legacy layout loop as reference')
+    args = parser.parse_args()
+
+    print(f'{"size MB":>8} {"words":>9} {"decode s":>9} {"decode MB/s":>11} {"pdf s":>7} {"pdf MB/s":>9}'
+          f'{" legacy s" if args.legacy else ""}')
+    for size in args.sizes:
+        pairs = generate_pairs(size_mb = size)
+        decode_time = measure(write_decode_text, pairs, char_lim = 120)
+        pdf_time = measure(get_page_lines, pairs, char_lim = 74)
+        legacy = f' {measure(legacy_decode_text, pairs, char_lim = 120):9.2f}' if args.legacy else ''
+        print(f'{size:8.1f} {len(pairs):9d} {decode_time:9.2f} {size / decode_time:11.1f} {pdf_time:7.2f} '
+              f'{size / pdf_time:9.1f}{legacy}')
+
+
+if __name__ == '__main__':
+    main()
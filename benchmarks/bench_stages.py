@@ -0,0 +1,229 @@
+"""
+Benchmark of every LanguageDecoder stage in isolation on reproducible synthetic corpora (see `synthetic_corpus.py´).
+The translator is a `FakeBackend´ without latency, so only the local work is measured. For every script, size
+and stage the best time of the repeats, the throughput (source MB/s) and the peak memory (tracemalloc) are reported.
+The results can be stored as named baseline and later runs compared against it (exit code 1 on regressions).
+
+    python benchmarks/bench_stages.py --sizes 1KB 64KB 1MB --save baseline
+    python benchmarks/bench_stages.py --sizes 1KB 64KB 1MB --compare baseline
+    python benchmarks/bench_stages.py --sizes 50MB --stages format layout_decode --no-memory
+"""
+import io
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import argparse
+import tempfile
+import tracemalloc
+import contextlib
+from typing import Callable, Dict, List, Optional
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from language_decoder.dictionaries import REPLACEMENTS, RU2DE  # noqa: E402
+from language_decoder.language_decoder import LanguageDecoder  # noqa: E402
+from language_decoder.translator_backends import FakeBackend  # noqa: E402
+from language_decoder.text_layout import write_decode_text, get_page_lines  # noqa: E402
+from language_decoder.aligned_sidecar import write_sidecar, get_sidecar_path  # noqa: E402
+from synthetic_corpus import CorpusGenerator, ALPHABETS, parse_size  # noqa: E402
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines')
+
+
+class StageContext(object):
+    """
+    The StageContext holds the corpus of one benchmark and the inputs of every stage,
+    each stage input is the output of the previous stage (computed once, outside of the measurements).
+    """
+
+    def __init__(self, text: str, work_path: str):
+        """
+        :param text: the source text of the benchmark
+        :param work_path: a directory for the files of the pdf stage
+        """
+
+        self.text = text
+        self.work_path = work_path
+        self.decoder = self.new_decoder()
+        self.source_text = self.decoder.text_formatting(text = text)
+        self.source_words = self.source_text.split()
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.translated_words = self.new_decoder()._translate_words(self.source_words)
+        self.decode_words = self.decoder._corrector.correct(self.translated_words)
+        self.pairs = [(source_word, self.decoder._add_missing_marks(source_word = source_word, decode_word = decode_word))
+                      for source_word, decode_word in zip(self.source_words, self.decode_words)]
+
+    @staticmethod
+    def new_decoder() -> LanguageDecoder:
+        # a decoder with an empty in-memory cache and a translator without latency
+        return LanguageDecoder(source_language = 'ru', target_language = 'de', replace_dict = REPLACEMENTS,
+                               dictionary = RU2DE, backend = FakeBackend(source = 'ru', target = 'de'),
+                               pack_words = True)
+
+
+def _stage_format(context: StageContext) -> Callable:
+    return lambda: context.decoder.text_formatting(text = context.text)
+
+
+def _stage_camel_case(context: StageContext) -> Callable:
+    return lambda: context.decoder._split_camel_case(text = context.text)
+
+
+def _stage_translate(context: StageContext) -> Callable:
+    decoder = context.new_decoder()
+    return lambda: decoder._translate_words(context.source_words)
+
+
+def _stage_correct(context: StageContext) -> Callable:
+    return lambda: context.decoder._corrector.correct(context.translated_words)
+
+
+def _stage_marks(context: StageContext) -> Callable:
+    add_missing_marks = context.decoder._add_missing_marks
+    return lambda: [add_missing_marks(source_word = source_word, decode_word = decode_word)
+                    for source_word, decode_word in zip(context.source_words, context.decode_words)]
+
+
+def _stage_layout_decode(context: StageContext) -> Callable:
+    decoder = context.decoder
+    return lambda: write_decode_text(context.pairs, char_lim = decoder.char_lim_decode, word_space = decoder.word_space,
+                                     new_line = decoder.new_line)
+
+
+def _stage_layout_pdf(context: StageContext) -> Callable:
+    decoder = context.decoder
+    return lambda: get_page_lines(context.pairs, char_lim = decoder.char_lim, word_space = decoder.word_space,
+                                  new_line = decoder.new_line)
+
+
+def _stage_pdf(context: StageContext) -> Callable:
+    # the decode text file and the sidecar are written once, the pdf is removed before every run
+    decoder = context.decoder
+    decode_path = os.path.join(context.work_path, 'bench_decode.txt')
+    pdf_path = os.path.join(context.work_path, 'bench.pdf')
+    if not os.path.isfile(decode_path):
+        with open(file = decode_path, mode = 'w', encoding = 'utf-8') as file:
+            file.write(write_decode_text(context.pairs, char_lim = decoder.char_lim_decode,
+                                         word_space = decoder.word_space, new_line = decoder.new_line))
+        write_sidecar(sidecar_path = get_sidecar_path(decode_path = decode_path), decode_path = decode_path,
+                      pairs = context.pairs)
+    if os.path.isfile(pdf_path):
+        os.remove(pdf_path)
+    return lambda: decoder.convert2pdf(decode_path = decode_path)
+
+
+# the stages in pipeline order (name -> setup returning the measured function)
+STAGES: Dict[str, Callable[[StageContext], Callable]] = {
+    'format': _stage_format,
+    'camel_case': _stage_camel_case,
+    'translate': _stage_translate,
+    'correct': _stage_correct,
+    'marks': _stage_marks,
+    'layout_decode': _stage_layout_decode,
+    'layout_pdf': _stage_layout_pdf,
+    'pdf': _stage_pdf,
+}
+
+
+def measure(setup: Callable[[StageContext], Callable], context: StageContext, repeat: int = 3,
+            memory: bool = True) -> Dict[str, Optional[float]]:
+    # get the best time of the repeats and the peak memory of an additional traced run
+    seconds = float('inf')
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(repeat):
+            func = setup(context)
+            start = time.perf_counter()
+            func()
+            seconds = min(seconds, time.perf_counter() - start)
+        peak_mb = None
+        if memory:
+            func = setup(context)
+            tracemalloc.start()
+            try:
+                func()
+                peak_mb = tracemalloc.get_traced_memory()[1] / 1e6
+            finally:
+                tracemalloc.stop()
+    return {'seconds': seconds, 'peak_mb': peak_mb}
+
+
+def run(scripts: List[str], sizes: List[str], stages: List[str], repeat: int = 3, memory: bool = True,
+        pdf_limit: int = 1 << 20, seed: int = 0) -> Dict[str, Dict[str, Optional[float]]]:
+    results = dict()
+    print(f'{"script":>9} {"size":>7} {"stage":>14} {"seconds":>9} {"MB/s":>9} {"peak MB":>9}')
+    for script in scripts:
+        generator = CorpusGenerator(script = script, seed = seed)
+        for size in sizes:
+            size_bytes = parse_size(size)
+            work_path = tempfile.mkdtemp(prefix = 'bench_stages_')
+            try:
+                context = StageContext(text = generator.generate(size = size_bytes), work_path = work_path)
+                for stage in stages:
+                    if stage == 'pdf' and size_bytes > pdf_limit:
+                        continue
+                    result = measure(STAGES[stage], context = context, repeat = repeat, memory = memory)
+                    result['mb_s'] = size_bytes / 1e6 / result['seconds'] if result['seconds'] > 0 else None
+                    results[f'{script}/{size}/{stage}'] = result
+                    peak_mb = '-' if result['peak_mb'] is None else f'{result["peak_mb"]:.1f}'
+                    mb_s = '-' if result['mb_s'] is None else f'{result["mb_s"]:.2f}'
+                    print(f'{script:>9} {size:>7} {stage:>14} {result["seconds"]:9.4f} {mb_s:>9} {peak_mb:>9}')
+            finally:
+                shutil.rmtree(work_path, ignore_errors = True)
+    return results
+
+
+def save_baseline(name: str, results: Dict[str, Dict[str, Optional[float]]]) -> str:
+    os.makedirs(BASELINE_PATH, exist_ok = True)
+    path = os.path.join(BASELINE_PATH, f'{name}.json')
+    state = {'python': platform.python_version(), 'platform': platform.platform(), 'machine': platform.machine(),
+             'created': time.strftime('%Y-%m-%dT%H:%M:%S'), 'results': results}
+    with open(file = path, mode = 'w', encoding = 'utf-8') as file:
+        json.dump(state, file, indent = 2, sort_keys = True)
+    return path
+
+
+def compare_baseline(name: str, results: Dict[str, Dict[str, Optional[float]]], tolerance: float = 0.15) -> int:
+    # print the time changes against the baseline and return the number of regressions
+    path = os.path.join(BASELINE_PATH, f'{name}.json')
+    with open(file = path, mode = 'r', encoding = 'utf-8') as file:
+        baseline = json.load(file)['results']
+    regressions = 0
+    print(f'\nCompared to baseline `{path}´ (tolerance {tolerance:.0%}):')
+    for key, result in results.items():
+        if key not in baseline or not baseline[key]['seconds']:
+            continue
+        change = result['seconds'] / baseline[key]['seconds'] - 1.
+        regressed = change > tolerance
+        regressions += regressed
+        print(f'{key:>36} {baseline[key]["seconds"]:9.4f} -> {result["seconds"]:9.4f} {change:+8.1%}'
+              f'{"  REGRESSION" if regressed else ""}')
+    print(f'{regressions} regressions.')
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description = 'Benchmark the LanguageDecoder stages on synthetic corpora.')
+    parser.add_argument('--sizes', nargs = '+', default = ['1KB', '64KB', '1MB'], help = 'corpus sizes (1KB - 50MB)')
+    parser.add_argument('--scripts', nargs = '+', default = ['cyrillic', 'latin'], choices = sorted(ALPHABETS))
+    parser.add_argument('--stages', nargs = '+', default = list(STAGES), choices = list(STAGES))
+    parser.add_argument('--repeat', type = int, default = 3, help = 'runs per stage, the best time is reported')
+    parser.add_argument('--no-memory', action = 'store_true', help = 'skip the traced peak memory run')
+    parser.add_argument('--pdf-limit', default = '1MB', help = 'largest corpus size of the pdf stage')
+    parser.add_argument('--seed', type = int, default = 0, help = 'seed of the corpora')
+    parser.add_argument('--save', help = 'store the results as named baseline')
+    parser.add_argument('--compare', help = 'compare the results to a named baseline')
+    parser.add_argument('--tolerance', type = float, default = 0.15, help = 'allowed relative slowdown to the baseline')
+    args = parser.parse_args()
+
+    results = run(scripts = args.scripts, sizes = args.sizes, stages = args.stages, repeat = args.repeat,
+                  memory = not args.no_memory, pdf_limit = parse_size(args.pdf_limit), seed = args.seed)
+    if args.save:
+        print(f'Baseline saved: `{save_baseline(name = args.save, results = results)}´.')
+    if args.compare and compare_baseline(name = args.compare, results = results, tolerance = args.tolerance):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
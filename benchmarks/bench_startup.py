@@ -0,0 +1,64 @@
+"""
+Benchmark of the cold start time of the package, e.g. of every spawned pdf rendering worker process.
+Every command runs in a fresh interpreter, the median wall time and the heavy dependencies loaded by the
+command are reported (fpdf and deep_translator are only loaded on their first use, the `render´ command fails if
+the pdf rendering loads deep_translator).
+
+    python benchmarks/bench_startup.py --runs 10
+"""
+import os
+import sys
+import time
+import argparse
+import statistics
+import subprocess
+from typing import List
+
+ROOT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+HEAVY_MODULES = ['fpdf', 'fontTools', 'deep_translator', 'requests', 'bs4']
+# name -> python statements of the measured command
+COMMANDS = {
+    'python': 'pass',
+    'import package': 'import language_decoder',
+    'import decoder': 'import language_decoder.language_decoder',
+    'decoder instance': 'from language_decoder.language_decoder import LanguageDecoder\n'
+                        'LanguageDecoder(backend = "fake")',
+    # a rendering worker of the google backend (the default) must not load the translator dependencies
+    'render': 'import os, sys, tempfile\nfrom language_decoder.language_decoder import LanguageDecoder\n'
+              'decode_path = os.path.join(tempfile.mkdtemp(), "text_decode.txt")\n'
+              'with open(file = decode_path, mode = "w", encoding = "utf-8") as file:\n'
+              '    file.write("дома    один.\\nzu Hause    eins.\\n\\n")\n'
+              'LanguageDecoder().convert2pdf(decode_path = decode_path)\n'
+              'assert "deep_translator" not in sys.modules, "The rendering loaded deep_translator."',
+    'cli --help': 'import sys\nfrom language_decoder.cli import main\nsys.argv = ["language_decoder", "--help"]\n'
+                  'try:\n    main()\nexcept SystemExit:\n    pass',
+}
+_REPORT = f'\nimport sys\nprint(",".join(name for name in {HEAVY_MODULES!r} if name in sys.modules), file = sys.stderr)'
+
+
+def measure(code: str, runs: int = 10) -> (float, str):
+    # get the median wall time in milliseconds and the loaded heavy modules of the python statements
+    times, loaded = list(), ''
+    for _ in range(runs):
+        start = time.perf_counter()
+        process = subprocess.run([sys.executable, '-c', code + _REPORT], cwd = ROOT_PATH, capture_output = True,
+                                 text = True, check = True)
+        times.append((time.perf_counter() - start) * 1e3)
+        loaded = process.stderr.strip().splitlines()[-1] if process.stderr.strip() else ''
+    return statistics.median(times), loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description = 'Benchmark the cold start time of the package.')
+    parser.add_argument('--runs', type = int, default = 10, help = 'fresh interpreters per command')
+    parser.add_argument('--commands', nargs = '+', default = list(COMMANDS), choices = list(COMMANDS))
+    args = parser.parse_args()
+
+    print(f'{"command":>18} {"median ms":>10}  loaded heavy modules')
+    for name in args.commands:
+        milliseconds, loaded = measure(COMMANDS[name], runs = args.runs)
+        print(f'{name:>18} {milliseconds:10.1f}  {loaded if loaded else "-"}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+"""
+Reproducible synthetic corpora for the benchmarks. The texts are generated from a seeded vocabulary with a
+Zipf-like word frequency, realistic punctuation, quotation marks, dialogue dashes, brackets and camelCase joins
+(two words glued together without a whitespace, as in badly extracted e-book texts).
+
+    python benchmarks/synthetic_corpus.py --sizes 1KB 1MB 50MB --scripts cyrillic latin --output corpora
+"""
+import os
+import re
+import random
+import argparse
+from itertools import accumulate
+from typing import List
+
+ALPHABETS = {
+    'cyrillic': ('бвгджзклмнпрстфхцчшщ', 'аеёиоуыэюя', 'ьй'),
+    'latin': ('bcdfghjklmnpqrstvwxz', 'aeiouy', 'h'),
+}
+# the quotation mark pairs of the scripts (opening, closing)
+QUOTES = {
+    'cyrillic': [('«', '»'), ('„', '“'), ('"', '"')],
+    'latin': [('"', '"'), ("'", "'"), ('“', '”')],
+}
+SENTENCE_ENDS = ['.'] * 14 + ['!', '?', '...', '?!']
+CLAUSE_MARKS = [','] * 10 + [';', ':', ' -', ' —']
+SIZE_UNITS = {'B': 1, 'KB': 1 << 10, 'MB': 1 << 20, 'GB': 1 << 30}
+
+
+def parse_size(size: str) -> int:
+    # '1KB' -> 1024, '50MB' -> 52428800
+    match = re.fullmatch(r'\s*(\d+(?:\.\d+)?)\s*([KMG]?B)?\s*', size.upper())
+    if match is None:
+        raise ValueError(f'Error in `parse_size´. Invalid size: `{size}´.')
+    return int(float(match.group(1)) * SIZE_UNITS[match.group(2) or 'B'])
+
+
+def generate_vocabulary(script: str = 'cyrillic', size: int = 20000, seed: int = 0) -> List[str]:
+    # generate unique words of consonant-vowel syllables, the short words come first (most frequent)
+    if script not in ALPHABETS:
+        raise ValueError(f'Error in `generate_vocabulary´. Unknown script: `{script}´.')
+    consonants, vowels, endings = ALPHABETS[script]
+    rnd = random.Random(seed)
+    words = dict()
+    while len(words) < size:
+        syllables = min(1 + int(rnd.expovariate(0.6)), 7)
+        word = ''.join(rnd.choice(consonants) + rnd.choice(vowels) for _ in range(syllables))
+        if rnd.random() < 0.15:
+            word += rnd.choice(endings)
+        words[word] = None
+    return sorted(words, key = len)
+
+
+class CorpusGenerator(object):
+    """
+    The CorpusGenerator writes a reproducible text of sentences and paragraphs for a script.
+    The same script, seed and size always give the same text.
+    """
+
+    def __init__(self, script: str = 'cyrillic', seed: int = 0, vocabulary_size: int = 20000):
+        """
+        :param script: the script of the text ('cyrillic', 'latin')
+        :param seed: the seed of the random generator
+        :param vocabulary_size: the number of unique words of the text
+        """
+
+        self.script = script
+        self.seed = seed
+        self.vocabulary = generate_vocabulary(script = script, size = vocabulary_size, seed = seed)
+        # Zipf-like word frequency
+        self._cum_weights = list(accumulate(1. / rank for rank in range(1, len(self.vocabulary) + 1)))
+
+    def _sentence(self, rnd: random.Random) -> str:
+        words = rnd.choices(self.vocabulary, cum_weights = self._cum_weights, k = rnd.randint(3, 22))
+        words[0] = words[0].capitalize()
+        for i in range(1, len(words)):
+            roll = rnd.random()
+            if roll < 0.08:
+                words[i - 1] += rnd.choice(CLAUSE_MARKS)
+            elif roll < 0.1:
+                words[i] = words[i].capitalize()
+            elif roll < 0.115:
+                # camelCase join of two words
+                words[i - 1] += words[i].capitalize()
+                words[i] = ''
+            elif roll < 0.125:
+                words[i] = f'({words[i]})'
+        sentence = ' '.join(word for word in words if word) + rnd.choice(SENTENCE_ENDS)
+        roll = rnd.random()
+        if roll < 0.1:
+            opening, closing = rnd.choice(QUOTES[self.script])
+            sentence = f'{opening}{sentence}{closing}'
+        elif roll < 0.15:
+            sentence = f'— {sentence}'
+        return sentence
+
+    def generate(self, size: int) -> str:
+        # generate a text of `size´ utf-8 bytes (the end is cut inside a sentence)
+        rnd = random.Random(f'{self.script}-{self.seed}')
+        paragraphs, written = list(), 0
+        while written < size:
+            paragraph = ' '.join(self._sentence(rnd) for _ in range(rnd.randint(1, 12)))
+            paragraphs.append(paragraph)
+            written += len(paragraph.encode('utf-8')) + 2
+        text = '\n\n'.join(paragraphs).encode('utf-8')[:size]
+        return text.decode('utf-8', errors = 'ignore')
+
+
+def generate_corpus(size: int, script: str = 'cyrillic', seed: int = 0) -> str:
+    return CorpusGenerator(script = script, seed = seed).generate(size = size)
+
+
+def main():
+    parser = argparse.ArgumentParser(description = 'Write reproducible synthetic corpora.')
+    parser.add_argument('--sizes', nargs = '+', default = ['1KB', '64KB', '1MB'], help = 'corpus sizes (e.g. 1KB, 50MB)')
+    parser.add_argument('--scripts', nargs = '+', default = ['cyrillic', 'latin'], choices = sorted(ALPHABETS))
+    parser.add_argument('--seed', type = int, default = 0, help = 'seed of the corpora')
+    parser.add_argument('--output', default = 'corpora', help = 'directory of the corpus text files')
+    args = parser.parse_args()
+
+    os.makedirs(args.output, exist_ok = True)
+    for script in args.scripts:
+        generator = CorpusGenerator(script = script, seed = args.seed)
+        for size in args.sizes:
+            path = os.path.join(args.output, f'{script}-{size}.txt')
+            with open(file = path, mode = 'w', encoding = 'utf-8') as file:
+                file.write(generator.generate(size = parse_size(size)))
+            print(f'Corpus written: `{path}´.')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,3 @@
 import os
-import sys
 
 PACKAGE_PATH = os.path.dirname(os.path.abspath(__file__))
-sys.path.append(PACKAGE_PATH)
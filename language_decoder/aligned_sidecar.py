@@ -0,0 +1,63 @@
+import json
+import hashlib
+from typing import Iterable, Iterator, Tuple, Optional, TextIO
+
+SIDECAR_VERSION = 1
+# the header has a fixed width, so the hash of the decode file can be written after the pairs
+_HEADER_PREFIX = f'{{"version": {SIDECAR_VERSION}, "sha256": "'
+_HEADER = f'{_HEADER_PREFIX}{"0" * 64}"}}\n'
+
+
+def file_sha256(path: str) -> str:
+    sha256 = hashlib.sha256()
+    with open(file = path, mode = 'rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b''):
+            sha256.update(block)
+    return sha256.hexdigest()
+
+
+def get_sidecar_path(decode_path: str) -> str:
+    # 'title_decode.txt' -> 'title_decode.jsonl'
+    return f'{decode_path[:-len(".txt")] if decode_path.endswith(".txt") else decode_path}.jsonl'
+
+
+def write_pairs(file: TextIO, pairs: Iterable[Tuple[str, str]]):
+    # write the header to a new sidecar file and append one json array [source word, decode word] per line
+    if file.tell() == 0:
+        file.write(_HEADER)
+    file.writelines(f'{json.dumps(pair, ensure_ascii = False)}\n' for pair in pairs)
+
+
+def seal_sidecar(sidecar_path: str, decode_path: str):
+    # write the hash of the decode file into the header, an edited decode file has a different hash
+    with open(file = sidecar_path, mode = 'r+b') as file:
+        file.seek(len(_HEADER_PREFIX.encode('utf-8')))
+        file.write(file_sha256(decode_path).encode('ascii'))
+
+
+def write_sidecar(sidecar_path: str, decode_path: str, pairs: Iterable[Tuple[str, str]]):
+    with open(file = sidecar_path, mode = 'w', encoding = 'utf-8') as file:
+        write_pairs(file = file, pairs = pairs)
+    seal_sidecar(sidecar_path = sidecar_path, decode_path = decode_path)
+
+
+def read_sidecar(sidecar_path: str) -> Iterator[Tuple[str, str]]:
+    # lazily read the aligned pairs
+    with open(file = sidecar_path, mode = 'r', encoding = 'utf-8') as file:
+        file.readline()
+        for line in file:
+            source_word, decode_word = json.loads(line)
+            yield source_word, decode_word
+
+
+def load_aligned_pairs(decode_path: str) -> Optional[Iterator[Tuple[str, str]]]:
+    # get the aligned pairs of the sidecar, None if there is no valid sidecar or the decode file was edited
+    sidecar_path = get_sidecar_path(decode_path = decode_path)
+    try:
+        with open(file = sidecar_path, mode = 'r', encoding = 'utf-8') as file:
+            header = json.loads(file.readline())
+    except (OSError, ValueError):
+        return
+    if header.get('version') != SIDECAR_VERSION or header.get('sha256') != file_sha256(decode_path):
+        return
+    return read_sidecar(sidecar_path = sidecar_path)
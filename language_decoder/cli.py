@@ -0,0 +1,150 @@
+import os
+import sys
+import argparse
+from typing import List, Iterator
+
+# the command line only imports the argument parser, the decoder and its dependencies are loaded by the subcommands
+
+
+def add_decoder_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument('--source', default = 'ru', help = 'the translation source language')
+    parser.add_argument('--target', default = 'de', help = 'the translation target language')
+    parser.add_argument('--backend', default = 'google', help = 'the translator backend')
+    parser.add_argument('--cache', default = None, help = 'path to the word translation cache file')
+    parser.add_argument('--lexicon', default = None, help = 'path to the lexicon file of the learned corrections')
+    parser.add_argument('--max-requests', type = int, default = 4, help = 'translation requests in flight')
+    parser.add_argument('--request-rate', type = float, default = None, help = 'translation requests per second')
+
+
+def get_decoder_kwargs(args: argparse.Namespace) -> dict:
+    # the keyword arguments of the LanguageDecoder from the parsed decoder arguments
+    from .dictionaries import REPLACEMENTS, RU2DE
+    return dict(source_language = args.source, target_language = args.target, backend = args.backend,
+                replace_dict = REPLACEMENTS, dictionary = RU2DE if args.target == 'de' else None,
+                cache_path = args.cache, lexicon_path = args.lexicon, pack_words = True,
+                max_requests = args.max_requests, request_rate = args.request_rate)
+
+
+def _find_files(paths: List[str], suffix: str, exclude: List[str]) -> Iterator[str]:
+    # the given files and the matching files of the given directories
+    from .corpus_pipeline import discover_files
+    for path in paths:
+        if os.path.isdir(path):
+            for file_path in discover_files(path):
+                if file_path.endswith(suffix) and not any(file_path.endswith(end) for end in exclude):
+                    yield file_path
+        else:
+            yield path
+
+
+def _decode(args: argparse.Namespace) -> int:
+    from .language_decoder import LanguageDecoder
+    decoder = LanguageDecoder(**get_decoder_kwargs(args))
+    failed = 0
+    for source_path in _find_files(args.paths, suffix = '.txt', exclude = ['decode.txt', 'transl.txt']):
+        decode_path, _ = decoder._get_decode_paths(source_path = source_path)
+        decoder.decode_text(source_path = source_path, translate_text = args.translate_text, stream = args.stream)
+        if decoder.is_pdf_stale(decode_path = decode_path):
+            # the pdf of the former decode text is regenerated
+            decoder.convert2pdf(decode_path = decode_path, update = True)
+        failed += not os.path.isfile(decode_path)
+    return 1 if failed else 0
+
+
+def _render(args: argparse.Namespace) -> int:
+    from .language_decoder import LanguageDecoder
+    decoder = LanguageDecoder(**get_decoder_kwargs(args))
+    failed = 0
+    for decode_path in _find_files(args.paths, suffix = '_decode.txt', exclude = []):
+        pdf_path, _ = decoder._get_pdf_paths(decode_path = decode_path)
+        decoder.convert2pdf(decode_path = decode_path)
+        failed += not os.path.isfile(pdf_path)
+    return 1 if failed else 0
+
+
+def _run(args: argparse.Namespace) -> int:
+    from .corpus_pipeline import CorpusRunner
+    from .decode_metrics import MetricsRegistry
+    runner = CorpusRunner(decoder_kwargs = get_decoder_kwargs(args), decode_workers = args.decode_workers,
+                          render_workers = args.render_workers, queue_size = args.queue_size,
+                          translate_text = args.translate_text, stream = args.stream, render_decoded = args.render_decoded,
+                          metrics = MetricsRegistry() if args.metrics else None)
+    failed = 0
+    for status in runner.run(base_path = args.base_path):
+        failed += status.status == 'failed'
+        print(f'{status.stage:<6} {status.status:<7} {status.duration:8.2f}s  {status.path}'
+              f'{"  " + status.error if status.error else ""}')
+    if args.metrics:
+        with open(file = args.metrics, mode = 'w', encoding = 'utf-8') as file:
+            file.write(runner.metrics.to_prometheus() if args.metrics.endswith('.prom') else
+                       runner.metrics.to_json(indent = 2))
+    return 1 if failed else 0
+
+
+def _serve(args: argparse.Namespace) -> int:
+    if args.port == 0 and args.watch is None:
+        raise SystemExit('Error in `serve´. Either the http api (--port) or a directory watcher (--watch) is required.')
+    if args.port and args.root is None and args.watch is None:
+        raise SystemExit('Error in `serve´. The http api requires a library directory (--root or --watch).')
+    from .decode_service import run_service
+    return run_service(args)
+
+
+def _languages(args: argparse.Namespace) -> int:
+    from .language_decoder import LanguageDecoder
+    LanguageDecoder(**get_decoder_kwargs(args)).get_supported_languages()
+    return 0
+
+
+def get_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog = 'language_decoder',
+                                     description = 'Decode texts word by word and convert the decodings to pdf.')
+    commands = parser.add_subparsers(dest = 'command', required = True)
+
+    decode = commands.add_parser('decode', help = 'decode text files (or all text files of directories)')
+    decode.add_argument('paths', nargs = '+', help = 'the text files or directories')
+    decode.add_argument('--translate-text', action = 'store_true', help = 'translate the whole texts')
+    decode.add_argument('--stream', action = 'store_true', help = 'decode in resumable chunks')
+    decode.set_defaults(func = _decode)
+
+    render = commands.add_parser('render', help = 'convert decoded text files (or directories) to pdf')
+    render.add_argument('paths', nargs = '+', help = 'the decoded text files or directories')
+    render.set_defaults(func = _render)
+
+    run = commands.add_parser('run', help = 'decode and render all text files of a corpus directory')
+    run.add_argument('base_path', help = 'the corpus directory')
+    run.add_argument('--decode-workers', type = int, default = 2, help = 'files decoded at the same time')
+    run.add_argument('--render-workers', type = int, default = None, help = 'pdf rendering processes')
+    run.add_argument('--queue-size', type = int, default = 16, help = 'queued jobs of each stage')
+    run.add_argument('--translate-text', action = 'store_true', help = 'translate the whole texts')
+    run.add_argument('--stream', action = 'store_true', help = 'decode in resumable chunks')
+    run.add_argument('--render-decoded', action = 'store_true', help = 'render new decoded files at once')
+    run.add_argument('--metrics', default = None, help = 'write the metrics to a json (or Prometheus .prom) file')
+    run.set_defaults(func = _run)
+
+    serve = commands.add_parser('serve', help = 'run a local service (http api and/or directory watcher) with warm state')
+    serve.add_argument('--host', default = '127.0.0.1', help = 'the host of the http api')
+    serve.add_argument('--port', type = int, default = 8765, help = 'the port of the http api (0: no http api)')
+    serve.add_argument('--watch', default = None, help = 'a library directory watched for new text files')
+    serve.add_argument('--root', default = None, help = 'the library directory of the submitted files (default: --watch)')
+    serve.add_argument('--interval', type = float, default = 2., help = 'seconds between two directory polls')
+    serve.add_argument('--workers', type = int, default = 2, help = 'jobs processed at the same time')
+    serve.add_argument('--translate-text', action = 'store_true', help = 'translate the whole texts')
+    serve.add_argument('--render-decoded', action = 'store_true', help = 'render new decoded files at once')
+    serve.set_defaults(func = _serve)
+
+    languages = commands.add_parser('languages', help = 'print the supported languages of the translator backend')
+    languages.set_defaults(func = _languages)
+
+    for command in [decode, render, run, serve, languages]:
+        add_decoder_arguments(command)
+    return parser
+
+
+def main(argv: List[str] = None) -> int:
+    args = get_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,208 @@
+import os
+import sys
+import time
+import queue
+import threading
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, Future
+from typing import Optional, Iterator, NamedTuple, List, Tuple, Iterable
+from .language_decoder import LanguageDecoder
+from .decode_metrics import NullMetrics, NULL_METRICS
+
+# the language decoder of a pdf rendering worker process
+_RENDER_DECODER: Optional[LanguageDecoder] = None
+# the rendering workers are spawned, a forked worker could inherit a lock held by a decode or translator thread
+_RENDER_CONTEXT = multiprocessing.get_context('spawn')
+
+
+class FileStatus(NamedTuple):
+    path: str
+    stage: str  # 'decode' or 'render'
+    status: str  # 'done', 'skipped' or 'failed'
+    result: Optional[str] = None
+    error: Optional[str] = None
+    duration: float = 0.
+
+
+def discover_files(base_path: str) -> Iterator[str]:
+    # lazily walk the base path and yield the text files
+    for directory, _, file_names in os.walk(base_path):
+        for file_name in sorted(file_names):
+            if file_name.endswith('.txt'):
+                yield os.path.join(directory, file_name)
+
+
+def _init_render_worker(decoder_kwargs: dict):
+    global _RENDER_DECODER
+    _RENDER_DECODER = LanguageDecoder(**decoder_kwargs)
+
+
+def _render_file(decode_path: str, update: bool = False) -> Optional[str]:
+    # the corrections are learned by the decoder process of the CorpusRunner
+    return _RENDER_DECODER.convert2pdf(decode_path = decode_path, update = update, learn = False)
+
+
+def _render_file_pages(decode_path: str) -> Tuple[Optional[str], int]:
+    # the corrections are only learned into a lexicon file (an in-memory lexicon of a worker is lost)
+    rendered_pages = _RENDER_DECODER._renderer.rendered_pages
+    pdf_path = _RENDER_DECODER.convert2pdf(decode_path = decode_path,
+                                           learn = _RENDER_DECODER.lexicon_path is not None)
+    return pdf_path, _RENDER_DECODER._renderer.rendered_pages - rendered_pages
+
+
+def render_batch(decode_paths: Iterable[str], decoder_kwargs: dict = None, processes: int = None) -> List[FileStatus]:
+    # render many decode files in a process pool, every process keeps its parsed font warm
+    decoder_kwargs = decoder_kwargs if isinstance(decoder_kwargs, dict) else dict()
+    statuses, pages = list(), 0
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers = processes, mp_context = _RENDER_CONTEXT, initializer = _init_render_worker,
+                             initargs = (decoder_kwargs,)) as render_pool:
+        futures = [(decode_path, render_pool.submit(_render_file_pages, decode_path)) for decode_path in decode_paths]
+        for decode_path, future in futures:
+            try:
+                pdf_path, file_pages = future.result()
+            except Exception as exception:
+                statuses.append(FileStatus(decode_path, 'render', 'failed', error = repr(exception)))
+                continue
+            pages += file_pages
+            statuses.append(FileStatus(decode_path, 'render', 'done' if pdf_path else 'skipped', result = pdf_path))
+    duration = time.perf_counter() - start
+    print(f'Rendered {pages} pages of {len(statuses)} files in {duration:.2f}s ({pages / duration:.1f} pages/sec).')
+    return statuses
+
+
+class CorpusRunner(object):
+    """
+    The CorpusRunner decodes and renders all text files of a corpus directory.
+    Decoding (network bound) runs in a thread pool and the pdf rendering (cpu bound) in a process pool,
+    so both stages overlap. The number of queued jobs of each stage is bounded.
+    """
+
+    def __init__(self,
+                 decoder_kwargs: dict = None,
+                 decode_workers: int = 2,
+                 render_workers: int = None,
+                 queue_size: int = 16,
+                 translate_text: bool = False,
+                 stream: bool = False,
+                 render_decoded: bool = False,
+                 metrics: NullMetrics = None):
+
+        """
+        :param decoder_kwargs: the keyword arguments of the LanguageDecoder
+        :param decode_workers: number of files decoded at the same time (translation concurrency: max_requests)
+        :param render_workers: number of pdf rendering processes (None: number of cpus)
+        :param queue_size: maximal number of queued jobs of each stage
+        :param translate_text: optional translation of the whole texts
+        :param stream: optional streaming decode with resumable checkpoints (bounded memory for large texts)
+        :param render_decoded: optional rendering of the new decoded files without manual check
+        :param metrics: a `MetricsRegistry´ of the decode stage and the file jobs (rendering processes are not recorded)
+        """
+
+        self.decoder_kwargs = decoder_kwargs if isinstance(decoder_kwargs, dict) else dict()
+        self.decode_workers = decode_workers
+        self.render_workers = render_workers if render_workers else os.cpu_count()
+        self.queue_size = queue_size
+        self.translate_text = translate_text
+        self.stream = stream
+        self.render_decoded = render_decoded
+        self.metrics = metrics if metrics is not None else NULL_METRICS
+        self._decoder = LanguageDecoder(**self.decoder_kwargs, metrics = self.metrics)
+
+    def run(self, base_path: str) -> Iterator[FileStatus]:
+        # yield the status of every file job as soon as it is finished
+        statuses = queue.Queue()
+        decode_slots = threading.Semaphore(self.queue_size)
+        render_slots = threading.Semaphore(self.queue_size)
+        jobs = {'submitted': 0, 'feeding': True}
+        # the decode files of the queued text files are only rendered by the decode stage after the decoding,
+        # so a pdf has one writer (new decode files with render_decoded, a stale pdf is regenerated)
+        queued = set()
+        lock = threading.Lock()
+
+        def count_job():
+            with lock:
+                jobs['submitted'] += 1
+
+        def submit_render(decode_path: str, update: bool = False):
+            # the manual corrections are learned into the lexicon of this process before the rendering
+            self._decoder.learn_corrections(decode_path = decode_path)
+            render_slots.acquire()
+            count_job()
+            start = time.perf_counter()
+            try:
+                future = render_pool.submit(_render_file, decode_path, update)
+            except Exception as exception:
+                # a broken pool fails the job (the job is counted and has to finish)
+                future = Future()
+                future.set_exception(exception)
+            future.add_done_callback(lambda f: finish(f, decode_path, 'render', start, render_slots))
+
+        def decode(source_path: str, existed: bool) -> Optional[str]:
+            decode_path = self._decoder.decode_text(source_path = source_path, translate_text = self.translate_text,
+                                                    stream = self.stream)
+            if existed:
+                # an existing decode file is rendered, its pdf is regenerated if the decoding rewrote it
+                submit_render(self._decoder._get_decode_paths(source_path = source_path)[0],
+                              update = decode_path is not None)
+            elif decode_path and self.render_decoded:
+                submit_render(decode_path)
+            return decode_path
+
+        def finish(future: Future, path: str, stage: str, start: float, slots: threading.Semaphore):
+            duration = time.perf_counter() - start
+            if future.exception() is not None:
+                status = FileStatus(path, stage, 'failed', error = repr(future.exception()), duration = duration)
+            elif future.result() is None:
+                status = FileStatus(path, stage, 'skipped', duration = duration)
+            else:
+                status = FileStatus(path, stage, 'done', result = future.result(), duration = duration)
+            self.metrics.count('files', stage = stage, status = status.status)
+            slots.release()
+            statuses.put(status)
+
+        def feed():
+            try:
+                for path in discover_files(base_path):
+                    if path.endswith('decode.txt'):
+                        # a text file is found before its decode file (`.´ < `_´)
+                        if path not in queued:
+                            submit_render(path)
+                    elif not path.endswith('transl.txt'):
+                        decode_path, _ = LanguageDecoder._get_decode_paths(source_path = path)
+                        queued.add(decode_path)
+                        decode_slots.acquire()
+                        count_job()
+                        start = time.perf_counter()
+                        future = decode_pool.submit(decode, path, os.path.isfile(decode_path))
+                        future.add_done_callback(lambda f, p = path, s = start: finish(f, p, 'decode', s, decode_slots))
+            finally:
+                with lock:
+                    jobs['feeding'] = False
+                statuses.put(None)
+
+        with ThreadPoolExecutor(max_workers = self.decode_workers, thread_name_prefix = 'decoder') as decode_pool, \
+                ProcessPoolExecutor(max_workers = self.render_workers, mp_context = _RENDER_CONTEXT,
+                                    initializer = _init_render_worker, initargs = (self.decoder_kwargs,)) as render_pool:
+            feeder = threading.Thread(target = feed, name = 'feeder', daemon = True)
+            feeder.start()
+            finished = 0
+            while True:
+                with lock:
+                    if not jobs['feeding'] and finished == jobs['submitted']:
+                        break
+                status = statuses.get()
+                if status is not None:
+                    finished += 1
+                    yield status
+            feeder.join()
+
+
+def main(argv: List[str] = None) -> int:
+    # the `run´ command of the command line
+    from .cli import main as cli_main
+    return cli_main(['run', *(sys.argv[1:] if argv is None else argv)])
+
+
+if __name__ == '__main__':
+    sys.exit(main())
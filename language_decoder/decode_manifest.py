@@ -0,0 +1,72 @@
+import os
+import json
+import hashlib
+from typing import List, Tuple, Dict, Optional
+
+MANIFEST_VERSION = 1
+
+
+def get_manifest_path(decode_path: str) -> str:
+    # 'title_decode.txt' -> 'title_decode.manifest.json'
+    return f'{decode_path[:-len(".txt")] if decode_path.endswith(".txt") else decode_path}.manifest.json'
+
+
+def content_hash(text: str) -> str:
+    return hashlib.blake2b(text.encode('utf-8'), digest_size = 16).hexdigest()
+
+
+class DecodeManifest(object):
+    """
+    The DecodeManifest is stored next to the decode outputs and records the hash of the source file,
+    the decoded words of every sentence (keyed by the sentence hash) and the translations of the text chunks.
+    A rerun on an edited source only translates the new or changed sentences.
+    """
+
+    def __init__(self, path: str, source_language: str, target_language: str):
+        """
+        :param path: path to the manifest file
+        :param source_language: the translation source language
+        :param target_language: the translation target language
+        """
+
+        self.path = path
+        self.languages = [source_language, target_language]
+        self.source_sha256: Optional[str] = None
+        self.order: List[str] = list()
+        self.sentences: Dict[str, Tuple[List[str], List[str]]] = dict()
+        self.translations: Dict[str, str] = dict()
+
+    def load(self) -> bool:
+        # load the manifest, returns if a manifest for the languages was found
+        if not os.path.isfile(self.path):
+            return False
+        try:
+            with open(file = self.path, mode = 'r', encoding = 'utf-8') as file:
+                state = json.load(file)
+        except ValueError:
+            return False
+        if state.get('version') != MANIFEST_VERSION or state.get('languages') != self.languages:
+            return False
+        self.source_sha256 = state['source_sha256']
+        self.order = state['order']
+        self.sentences = {key: (source_words, decode_words)
+                          for key, (source_words, decode_words) in state['sentences'].items()}
+        self.translations = state['translations']
+        return True
+
+    def get_pairs(self, order: List[str] = None) -> List[Tuple[str, str]]:
+        # get the aligned (source word, decode word) pairs of the sentences in order
+        return [pair for key in (self.order if order is None else order) for pair in zip(*self.sentences[key])]
+
+    def save(self, source_sha256: str, order: List[str], chunk_keys: List[str] = None):
+        # save the manifest with the sentences and chunk translations in use only
+        self.source_sha256 = source_sha256
+        self.order = order
+        self.sentences = {key: self.sentences[key] for key in order}
+        if chunk_keys is not None:
+            self.translations = {key: self.translations[key] for key in chunk_keys if key in self.translations}
+        state = {'version': MANIFEST_VERSION, 'languages': self.languages, 'source_sha256': source_sha256,
+                 'order': order, 'sentences': self.sentences, 'translations': self.translations}
+        with open(file = f'{self.path}.tmp', mode = 'w', encoding = 'utf-8') as file:
+            json.dump(state, file, ensure_ascii = False, separators = (',', ':'))
+        os.replace(f'{self.path}.tmp', self.path)
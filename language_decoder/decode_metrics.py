@@ -0,0 +1,167 @@
+import json
+import time
+import threading
+from contextlib import nullcontext
+from typing import Callable, Dict, List, Optional, Tuple
+
+# the stages of the decoding and the pdf conversion
+STAGES = ('read', 'format', 'translate', 'correct', 'layout', 'write', 'render')
+
+_NULL_STAGE = nullcontext()
+
+
+class NullMetrics(object):
+    """
+    The NullMetrics is the default instrumentation of the LanguageDecoder and records nothing.
+    Every method is a no-op, so the instrumented code paths cost a method call only.
+    """
+
+    enabled = False
+
+    def stage(self, name: str):
+        # a context manager timing the stage
+        return _NULL_STAGE
+
+    def count(self, name: str, value: float = 1, **labels: str):
+        pass
+
+    def observe(self, name: str, seconds: float):
+        pass
+
+
+class _StageTimer(object):
+
+    __slots__ = ('_metrics', '_name', '_start')
+
+    def __init__(self, metrics: 'MetricsRegistry', name: str):
+        self._metrics = metrics
+        self._name = name
+        self._start = 0.
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._metrics.observe(self._name, time.perf_counter() - self._start)
+        return False
+
+
+class MetricsRegistry(NullMetrics):
+    """
+    The MetricsRegistry records the stage durations and the counters (requests, characters, errors by type,
+    cache hits) of one or more LanguageDecoders thread-safe. The metrics are exported as json or in the
+    Prometheus text format, hooks get every recorded value (e.g. to forward it to another metrics system).
+    """
+
+    enabled = True
+
+    def __init__(self, prefix: str = 'language_decoder', hooks: Optional[List[Callable]] = None):
+        """
+        :param prefix: the prefix of the Prometheus metric names
+        :param hooks: callables called with (metric name, value, labels) for every recorded value
+        """
+
+        self.prefix = prefix
+        self.hooks = list(hooks) if hooks else list()
+        self._counters: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], float] = dict()
+        # stage -> [count, total seconds, max seconds]
+        self._stages: Dict[str, List[float]] = dict()
+        self._lock = threading.Lock()
+
+    def stage(self, name: str) -> _StageTimer:
+        return _StageTimer(self, name)
+
+    def count(self, name: str, value: float = 1, **labels: str):
+        key = name, tuple(sorted(labels.items()))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+        for hook in self.hooks:
+            hook(name, value, labels)
+
+    def observe(self, name: str, seconds: float):
+        with self._lock:
+            stats = self._stages.setdefault(name, [0, 0., 0.])
+            stats[0] += 1
+            stats[1] += seconds
+            stats[2] = max(stats[2], seconds)
+        for hook in self.hooks:
+            hook('stage_seconds', seconds, {'stage': name})
+
+    def get(self, name: str, **labels: str) -> float:
+        # get the counter value, without labels the sum over all labels
+        with self._lock:
+            if labels:
+                return self._counters.get((name, tuple(sorted(labels.items()))), 0)
+            return sum(value for (key, _), value in self._counters.items() if key == name)
+
+    def cache_hit_rate(self) -> Optional[float]:
+        hits, misses = self.get('cache_hits'), self.get('cache_misses')
+        return hits / (hits + misses) if hits + misses else None
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._stages.clear()
+
+    def to_dict(self) -> dict:
+        # counters without labels are values, counters with labels are dicts ('key=value,...' -> value)
+        with self._lock:
+            stages = {name: {'count': count, 'seconds': total, 'max_seconds': maximum}
+                      for name, (count, total, maximum) in self._stages.items()}
+            counters = dict()
+            for (name, labels), value in sorted(self._counters.items()):
+                if labels:
+                    counters.setdefault(name, dict())[','.join(f'{key}={label}' for key, label in labels)] = value
+                else:
+                    counters[name] = value
+        return {'stages': stages, 'counters': counters, 'cache_hit_rate': self.cache_hit_rate()}
+
+    def to_json(self, **kwargs) -> str:
+        return json.dumps(self.to_dict(), **kwargs)
+
+    @staticmethod
+    def _format_labels(labels: Tuple[Tuple[str, str], ...]) -> str:
+        if not labels:
+            return ''
+        pairs = list()
+        for key, label in labels:
+            label = str(label).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+            pairs.append(f'{key}="{label}"')
+        return '{' + ','.join(pairs) + '}'
+
+    @staticmethod
+    def _format_value(value: float) -> str:
+        # integers are written exactly, floats as the shortest exact representation (`{value:g}´ keeps 6 digits)
+        if isinstance(value, int):
+            return str(value)
+        if value != value:
+            return 'NaN'
+        if value in (float('inf'), float('-inf')):
+            return '+Inf' if value > 0 else '-Inf'
+        return repr(float(value))
+
+    def to_prometheus(self) -> str:
+        # the counters as `<prefix>_<name>_total´, the stage durations as summary and maximum gauge
+        with self._lock:
+            counters = sorted(self._counters.items())
+            stages = sorted(self._stages.items())
+        lines = list()
+        for c, ((name, labels), value) in enumerate(counters):
+            metric = f'{self.prefix}_{name}_total'
+            if c == 0 or counters[c - 1][0][0] != name:
+                lines.append(f'# TYPE {metric} counter')
+            lines.append(f'{metric}{self._format_labels(labels)} {self._format_value(value)}')
+        if stages:
+            metric = f'{self.prefix}_stage_seconds'
+            lines.append(f'# TYPE {metric} summary')
+            for name, (count, total, _) in stages:
+                lines.append(f'{metric}_sum{{stage="{name}"}} {total:.6f}')
+                lines.append(f'{metric}_count{{stage="{name}"}} {self._format_value(count)}')
+            lines.append(f'# TYPE {metric}_max gauge')
+            for name, (_, _, maximum) in stages:
+                lines.append(f'{metric}_max{{stage="{name}"}} {maximum:.6f}')
+        return '\n'.join(lines) + '\n'
+
+
+NULL_METRICS = NullMetrics()
@@ -0,0 +1,405 @@
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+import itertools
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Optional, Dict, List, Tuple
+from urllib.parse import urlparse, parse_qs
+from .language_decoder import LanguageDecoder
+from .corpus_pipeline import discover_files
+from .decode_metrics import NullMetrics, MetricsRegistry, NULL_METRICS
+
+JOB_KINDS = ('decode', 'pdf', 'run')
+
+
+class DecodeJob(object):
+    """
+    The DecodeJob is one queued submission of the DecodeService.
+    The kinds are 'decode' (text file -> decode text file), 'pdf' (decode text file -> pdf) and 'run' (both).
+    """
+
+    def __init__(self, job_id: str, kind: str, path: str, translate_text: bool = False):
+        """
+        :param job_id: the id of the job
+        :param kind: the kind of the job ('decode', 'pdf', 'run')
+        :param path: path to the text file (decode, run) or the decode text file (pdf)
+        :param translate_text: optional translation of the whole text
+        """
+
+        self.job_id = job_id
+        self.kind = kind
+        self.path = path
+        self.translate_text = translate_text
+        self.status = 'queued'  # 'queued', 'running', 'done', 'skipped' or 'failed'
+        self.result: Dict[str, str] = dict()
+        self.error: Optional[str] = None
+        self.submitted = time.time()
+        self.duration = 0.
+        self._finished = threading.Event()
+
+    @property
+    def finished(self) -> bool:
+        return self._finished.is_set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._finished.wait(timeout = timeout)
+
+    def to_dict(self) -> dict:
+        return {'id': self.job_id, 'kind': self.kind, 'path': self.path, 'status': self.status, 'result': self.result,
+                'error': self.error, 'submitted': self.submitted, 'duration': self.duration}
+
+
+class DecodeService(object):
+    """
+    The DecodeService keeps one LanguageDecoder warm (translator session, word cache and parsed pdf font)
+    and processes the submitted jobs in a thread pool. Submissions of the same job for a file are coalesced
+    while it is queued or running, and concurrent word translations share the requests of words in flight.
+    """
+
+    def __init__(self,
+                 decoder_kwargs: dict = None,
+                 workers: int = 2,
+                 max_jobs: int = 1000,
+                 root: Optional[str] = None,
+                 metrics: NullMetrics = None):
+
+        """
+        :param decoder_kwargs: the keyword arguments of the LanguageDecoder
+        :param workers: number of jobs processed at the same time (translation concurrency: max_requests)
+        :param max_jobs: number of finished jobs kept for the status requests
+        :param root: the library directory, files outside are rejected (None: files of any directory)
+        :param metrics: a `MetricsRegistry´ of the decoder and the jobs (None: no metrics)
+        """
+
+        self.decoder_kwargs = decoder_kwargs if isinstance(decoder_kwargs, dict) else dict()
+        self.workers = workers
+        self.max_jobs = max_jobs
+        self.root = os.path.realpath(root) if root is not None else None
+        self.metrics = metrics if metrics is not None else NULL_METRICS
+        self._decoder = LanguageDecoder(**self.decoder_kwargs, metrics = self.metrics)
+        self._pool = ThreadPoolExecutor(max_workers = workers, thread_name_prefix = 'service')
+        self._ids = itertools.count(1)
+        self._jobs: Dict[str, DecodeJob] = OrderedDict()
+        # (kind, path) -> queued or running job
+        self._inflight: Dict[Tuple[str, str], DecodeJob] = dict()
+        # jobs of different kinds on the same file (the text file and its decode text file) run one after another,
+        # a lock is kept with the number of its running jobs
+        self._path_locks: Dict[str, Tuple[threading.Lock, int]] = dict()
+        self._lock = threading.Lock()
+
+    def submit(self, path: str, kind: str = 'decode', translate_text: bool = False) -> DecodeJob:
+        # queue a job, a queued or running job of the same kind and file is returned instead
+        if kind not in JOB_KINDS:
+            raise ValueError(f'Error in `DecodeService.submit´. Unknown job kind: `{kind}´.')
+        # the text files (decode, run) and the decode text files (pdf) of the library directory
+        path = os.path.realpath(path)
+        if self.root is not None and os.path.commonpath([self.root, path]) != self.root:
+            raise PermissionError(f'Error in `DecodeService.submit´. File outside of the library: `{path}´.')
+        if not path.endswith('_decode.txt' if kind == 'pdf' else '.txt') or \
+                kind != 'pdf' and (path.endswith('decode.txt') or path.endswith('transl.txt')):
+            raise ValueError(f'Error in `DecodeService.submit´. Invalid file for a {kind} job: `{path}´.')
+        if not os.path.isfile(path):
+            raise OSError(f'Error in `DecodeService.submit´. File not found: `{path}´.')
+        with self._lock:
+            job = self._inflight.get((kind, path))
+            if job is not None:
+                self.metrics.count('jobs_coalesced', kind = kind)
+                return job
+            job = DecodeJob(job_id = str(next(self._ids)), kind = kind, path = path, translate_text = translate_text)
+            self._inflight[(kind, path)] = job
+            self._jobs[job.job_id] = job
+            self._forget_jobs()
+        self.metrics.count('jobs_submitted', kind = kind)
+        self._pool.submit(self._run_job, job)
+        return job
+
+    def _forget_jobs(self):
+        # drop the oldest finished jobs (called with the lock)
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        for job_id in finished[:max(0, len(self._jobs) - self.max_jobs)]:
+            del self._jobs[job_id]
+
+    def get_job(self, job_id: str) -> Optional[DecodeJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def get_jobs(self) -> List[DecodeJob]:
+        with self._lock:
+            return list(self._jobs.values())
+
+    def _acquire_path_lock(self, path: str) -> threading.Lock:
+        with self._lock:
+            lock, jobs = self._path_locks.get(path, (threading.Lock(), 0))
+            self._path_locks[path] = lock, jobs + 1
+        lock.acquire()
+        return lock
+
+    def _release_path_lock(self, path: str):
+        # the lock is dropped with the last running job of the path
+        with self._lock:
+            lock, jobs = self._path_locks[path]
+            if jobs == 1:
+                del self._path_locks[path]
+            else:
+                self._path_locks[path] = lock, jobs - 1
+        lock.release()
+
+    def _run_job(self, job: DecodeJob):
+        start = time.perf_counter()
+        job.status = 'running'
+        try:
+            decode_path = job.path if job.kind == 'pdf' else self._decoder._get_decode_paths(source_path = job.path)[0]
+            self._acquire_path_lock(decode_path)
+            try:
+                job.status, job.result = self._process(job)
+            finally:
+                self._release_path_lock(decode_path)
+        except Exception as exception:
+            job.status, job.error = 'failed', repr(exception)
+        finally:
+            job.duration = time.perf_counter() - start
+            with self._lock:
+                self._inflight.pop((job.kind, job.path), None)
+            self.metrics.count('jobs', kind = job.kind, status = job.status)
+            job._finished.set()
+
+    def _process(self, job: DecodeJob) -> Tuple[str, Dict[str, str]]:
+        # get the job status and the paths of the existing outputs
+        result, created = dict(), False
+        decode_path = job.path
+        if job.kind in ('decode', 'run'):
+            decode_path, transl_path = self._decoder._get_decode_paths(source_path = job.path)
+            created = self._decoder.decode_text(source_path = job.path, translate_text = job.translate_text) is not None
+            if not os.path.isfile(decode_path):
+                return 'failed', result
+            result['decode_path'] = decode_path
+            if os.path.isfile(transl_path):
+                result['transl_path'] = transl_path
+            if job.kind == 'decode' and self._decoder.is_pdf_stale(decode_path = decode_path):
+                # the stale pdf is regenerated by one queued pdf job (after this job, see `_path_locks´)
+                result['pdf_job'] = self.submit(path = decode_path, kind = 'pdf').job_id
+        if job.kind in ('pdf', 'run'):
+            pdf_path, _ = self._decoder._get_pdf_paths(decode_path = decode_path)
+            created = self._decoder.convert2pdf(decode_path = decode_path, update = True) is not None or created
+            if not os.path.isfile(pdf_path):
+                return 'failed', result
+            result['pdf_path'] = pdf_path
+        return 'done' if created else 'skipped', result
+
+    def translate_words(self, words: List[str]) -> List[Optional[str]]:
+        # decode the words (None: failed), words in flight of concurrent jobs and requests are translated once
+        decodes = self._decoder._corrector.correct(self._decoder._translate_words(words, keep_failed = True))
+        return [None if decode is None else self._decoder._add_missing_marks(source_word = word, decode_word = decode)
+                for word, decode in zip(words, decodes)]
+
+    def shutdown(self, wait: bool = True):
+        self._pool.shutdown(wait = wait)
+        self._decoder._executor.shutdown()
+
+
+class DirectoryWatcher(object):
+    """
+    The DirectoryWatcher polls a library directory and submits the new or changed text files to the DecodeService.
+    A file is submitted when its size and modification time did not change between two polls (completely copied).
+    """
+
+    def __init__(self, service: DecodeService, base_path: str, interval: float = 2., kind: str = 'decode',
+                 translate_text: bool = False):
+        """
+        :param service: the service processing the files
+        :param base_path: the library directory
+        :param interval: seconds between two polls
+        :param kind: the job kind of new text files ('decode' or 'run')
+        :param translate_text: optional translation of the whole texts
+        """
+
+        self.service = service
+        self.base_path = base_path
+        self.interval = interval
+        self.kind = kind
+        self.translate_text = translate_text
+        self._seen: Dict[str, Tuple[int, float]] = dict()
+        self._pending: Dict[str, Tuple[int, float]] = dict()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def poll(self) -> List[DecodeJob]:
+        jobs = list()
+        for path in discover_files(self.base_path):
+            if path.endswith('decode.txt') or path.endswith('transl.txt'):
+                continue
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            state = stat.st_size, stat.st_mtime
+            if self._seen.get(path) == state:
+                continue
+            if self._pending.get(path) != state:
+                self._pending[path] = state
+                continue
+            del self._pending[path]
+            self._seen[path] = state
+            try:
+                jobs.append(self.service.submit(path = path, kind = self.kind, translate_text = self.translate_text))
+            except OSError as exception:
+                # the file was removed (or renamed) after the poll
+                print(exception)
+                self._seen.pop(path, None)
+        return jobs
+
+    def _watch(self):
+        while not self._stop.is_set():
+            for job in self.poll():
+                print(f'Submitted job {job.job_id} ({job.kind}): `{job.path}´.')
+            self._stop.wait(self.interval)
+
+    def start(self):
+        self._thread = threading.Thread(target = self._watch, name = 'watcher', daemon = True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+
+class ServiceHandler(BaseHTTPRequestHandler):
+    """
+    The ServiceHandler is the local http api of the DecodeService:
+        POST /jobs {"path": ..., "kind": "decode|pdf|run", "translate_text": false}  -> the job (202)
+        GET  /jobs, GET /jobs/<id>?wait=<seconds>                                    -> the job(s)
+        POST /translate {"words": [...]}                                             -> {"decodes": [...]}
+        GET  /metrics                                                                -> Prometheus text format
+        GET  /health                                                                 -> {"status": "ok"}
+    """
+
+    service: DecodeService = None
+
+    def _send(self, code: int, body, content_type: str = 'application/json'):
+        data = (json.dumps(body, ensure_ascii = False) if content_type == 'application/json' else body).encode('utf-8')
+        self.send_response(code)
+        self.send_header('Content-Type', f'{content_type}; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _read_json(self) -> dict:
+        length = int(self.headers.get('Content-Length') or 0)
+        body = json.loads(self.rfile.read(length) or b'{}')
+        if not isinstance(body, dict):
+            raise ValueError('Error in `ServiceHandler´. The request body is not a json object.')
+        return body
+
+    def do_GET(self):  # noqa
+        url = urlparse(self.path)
+        parts = [part for part in url.path.split('/') if part]
+        if parts == ['health']:
+            self._send(200, {'status': 'ok'})
+        elif parts == ['metrics']:
+            if isinstance(self.service.metrics, MetricsRegistry):
+                self._send(200, self.service.metrics.to_prometheus(), content_type = 'text/plain; version=0.0.4')
+            else:
+                self._send(404, {'error': 'metrics are disabled'})
+        elif parts == ['jobs']:
+            self._send(200, {'jobs': [job.to_dict() for job in self.service.get_jobs()]})
+        elif len(parts) == 2 and parts[0] == 'jobs':
+            job = self.service.get_job(parts[1])
+            if job is None:
+                self._send(404, {'error': f'unknown job: {parts[1]}'})
+                return
+            wait = parse_qs(url.query).get('wait')
+            if wait:
+                try:
+                    timeout = float(wait[0])
+                except ValueError:
+                    timeout = float('nan')
+                if not 0. <= timeout < float('inf'):
+                    self._send(400, {'error': f'`wait´ has to be a number of seconds: {wait[0]}'})
+                    return
+                job.wait(timeout = min(timeout, 300.))
+            self._send(200, job.to_dict())
+        else:
+            self._send(404, {'error': 'not found'})
+
+    def do_POST(self):  # noqa
+        parts = [part for part in urlparse(self.path).path.split('/') if part]
+        if self.headers.get_content_type() != 'application/json':
+            self._send(415, {'error': 'the request body has to be application/json'})
+            return
+        try:
+            body = self._read_json()
+            if parts == ['jobs']:
+                if not isinstance(body['path'], str) or not isinstance(body.get('kind', 'decode'), str):
+                    raise ValueError('Error in `ServiceHandler´. `path´ and `kind´ have to be strings.')
+                job = self.service.submit(path = body['path'], kind = body.get('kind', 'decode'),
+                                          translate_text = bool(body.get('translate_text', False)))
+                self._send(202, job.to_dict())
+            elif parts == ['translate']:
+                words = body.get('words')
+                if not isinstance(words, list) or not all(isinstance(word, str) for word in words):
+                    raise ValueError('Error in `ServiceHandler´. `words´ has to be a list of strings.')
+                self._send(200, {'decodes': self.service.translate_words(words)})
+            else:
+                self._send(404, {'error': 'not found'})
+        except KeyError as exception:
+            self._send(400, {'error': f'missing field: {exception}'})
+        except PermissionError as exception:
+            self._send(403, {'error': str(exception)})
+        except (OSError, ValueError) as exception:
+            self._send(400, {'error': str(exception)})
+
+    def log_message(self, format: str, *args):  # noqa
+        pass
+
+
+def serve(service: DecodeService, host: str = '127.0.0.1', port: int = 8765) -> ThreadingHTTPServer:
+    # create the http server of the service (run it with `serve_forever´)
+    handler = type('BoundServiceHandler', (ServiceHandler,), {'service': service})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def run_service(args: argparse.Namespace) -> int:
+    # run the service of the parsed `serve´ command line arguments until it is interrupted
+    from .cli import get_decoder_kwargs
+    decoder_kwargs = get_decoder_kwargs(args)
+    # the library directory of the submitted files is the watched directory by default
+    root = args.root if args.root is not None else args.watch
+    service = DecodeService(decoder_kwargs = decoder_kwargs, workers = args.workers, root = root,
+                            metrics = MetricsRegistry())
+    watcher = None
+    if args.watch is not None:
+        watcher = DirectoryWatcher(service = service, base_path = args.watch, interval = args.interval,
+                                   kind = 'run' if args.render_decoded else 'decode',
+                                   translate_text = args.translate_text)
+        watcher.start()
+        print(f'Watching `{args.watch}´ for new text files.')
+    try:
+        if args.port:
+            server = serve(service = service, host = args.host, port = args.port)
+            print(f'Serving the language decoder on http://{args.host}:{server.server_address[1]}.')
+            server.serve_forever()
+        else:
+            while True:
+                time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if watcher is not None:
+            watcher.stop()
+        service.shutdown(wait = False)
+    return 0
+
+
+def main(argv: List[str] = None) -> int:
+    from .cli import main as cli_main
+    return cli_main(['serve', *(sys.argv[1:] if argv is None else argv)])
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,13 +1,27 @@
+import io
 import os
-import re
+import zlib
 import textwrap
-from fpdf import FPDF
-from typing import Optional, Tuple, List
-from pprint import PrettyPrinter
-from deep_translator import GoogleTranslator
-from deep_translator.exceptions import RequestError, TooManyRequests, MicrosoftAPIerror
-from dictionaries import PUNCTUATIONS, BEG_PATTERNS, END_PATTERNS, QUO_PATTERNS
-from dictionaries import REPLACEMENTS, RU2DE
+import threading
+from concurrent.futures import Future
+from typing import Optional, Tuple, List, Callable, Union, Iterator, Dict, TYPE_CHECKING
+from .word_cache import WordCache
+from .word_lexicon import WordLexicon, diff_decode_file, align_decode_file
+from .word_packing import pack_words, join_payload, split_payload
+from .translation_executor import TranslationExecutor
+from .translator_backends import TranslatorBackend, BACKENDS, get_backend
+from .text_layout import write_decode_text, get_page_lines
+from .text_stream import read_sentence_chunks, split_sentences, chunk_sentences, Checkpoint, open_partial
+from .phrase_corrector import PhraseCorrector
+from .pdf_renderer import PdfRenderer
+from .aligned_sidecar import get_sidecar_path, write_pairs, write_sidecar, seal_sidecar, load_aligned_pairs, file_sha256, \
+    read_sidecar
+from .decode_manifest import DecodeManifest, get_manifest_path, content_hash
+from .decode_metrics import NullMetrics, NULL_METRICS
+from .text_normalizer import TextNormalizer, split_camel_case, BEG_MARKS, END_MARKS, QUO_MARKS
+
+if TYPE_CHECKING:
+    from fpdf import FPDF
 
 PACKAGE_PATH = os.path.dirname(os.path.relpath(__file__))
 
@@ -15,18 +29,31 @@ PACKAGE_PATH = os.path.dirname(os.path.relpath(__file__))
 class LanguageDecoder(object):
     """
     The LanguageDecoder is used to translate a text from a source language to a given target language word by word (decoding).
-    Therefor the Google translator is used to generate a decoded text file.
+    Therefor the Google translator (or another translator backend) is used to generate a decoded text file.
     After checking the decoded text file, the decoding can be converted to a pdf file.
     """
 
     def __init__(self,
                  source_language: str = 'auto',
                  target_language: str = 'en',
+                 backend: Union[str, TranslatorBackend] = 'google',
+                 backend_options: dict = None,
                  new_line: str = '\n',
                  word_space: int = 4,
                  char_lim_decode: int = 120,
                  replace_dict: dict = None,
                  dictionary: dict = None,
+                 cache_path: str = None,
+                 cache_size: int = 1000000,
+                 lexicon_path: str = None,
+                 pack_words: bool = False,
+                 pack_lim: int = 4500,
+                 pack_delimiter: str = '\n',
+                 max_requests: int = 4,
+                 request_rate: float = None,
+                 retries: int = 5,
+                 transl_chunk_lim: int = 4500,
+                 metrics: NullMetrics = None,
                  font_path: str = 'fonts/NotoMono/NotoMono.ttf',
                  page_sep: bool = False,
                  char_lim: int = 74,
@@ -40,11 +67,24 @@ class LanguageDecoder(object):
         # TEXT DECODING PARAMETER
         :param source_language: the translation source language
         :param target_language: the translation target language
+        :param backend: the translator backend name ('google', 'dictionary', 'fake') or a `TranslatorBackend´ instance
+        :param backend_options: additional keyword arguments for the translator backend
         :param new_line: new line string
         :param word_space: the space between two words
         :param char_lim_decode: character limit of one line for decode text file
         :param replace_dict: a dictionary to replace marks
         :param dictionary: a dictionary to correct common translation mistakes
+        :param cache_path: path to the word translation cache file (None: cache is kept in memory only)
+        :param cache_size: maximal number of words in the word translation cache
+        :param lexicon_path: path to the lexicon file of the learned manual corrections (None: kept in memory only)
+        :param pack_words: optional packing of many words into one translation request
+        :param pack_lim: character limit of one packed translation request (max: 5000)
+        :param pack_delimiter: delimiter between the words of one packed translation request
+        :param max_requests: maximal number of translation requests in flight
+        :param request_rate: maximal number of translation requests per second (None: unlimited)
+        :param retries: maximal number of retries of a throttled or failed translation request
+        :param transl_chunk_lim: character limit of one chunk of sentences for the text translation (max: 5000)
+        :param metrics: a `MetricsRegistry´ recording stage durations and counters (None: no metrics)
         # PDF FORMATTING PARAMETER
         :param font_path: path to the font used for the pdf (monospace font recommended)
         :param page_sep: optional pdf page seperator activation
@@ -56,8 +96,14 @@ class LanguageDecoder(object):
         :param pdf_h: height for each pdf line (5.18 - 5.28)
         """
 
-        self._pp = PrettyPrinter(indent = 4)
-        self._translator = GoogleTranslator(source = source_language, target = target_language)
+        # the translator backend is created on its first use (the google backend loads deep_translator, requests and
+        # bs4), so the pdf rendering (and every spawned rendering worker) starts without them
+        if isinstance(backend, str) and backend not in BACKENDS:
+            raise ValueError(f'Error in `LanguageDecoder´. Unknown translator backend `{backend}´.')
+        self.backend = backend
+        self.backend_options = backend_options if isinstance(backend_options, dict) else dict()
+        self._backend: Optional[TranslatorBackend] = None if isinstance(backend, str) else get_backend(backend)
+        self._backend_lock = threading.Lock()
         self.source_language = source_language
         self.target_language = target_language
         self.new_line = new_line
@@ -66,9 +112,24 @@ class LanguageDecoder(object):
         self.replace_dict = replace_dict
         if not isinstance(self.replace_dict, dict):
             self.replace_dict = dict()
+        self._normalizer = TextNormalizer(replace_dict = self.replace_dict)
         self.dictionary = dictionary
         if not isinstance(self.dictionary, dict):
             self.dictionary = dict()
+        self._corrector = PhraseCorrector(dictionary = self.dictionary)
+        self._cache = WordCache(path = cache_path, max_size = cache_size)
+        self.lexicon_path = lexicon_path
+        self._lexicon = WordLexicon(path = lexicon_path)
+        # normalized word -> translation in flight, concurrent decodes translate a word once
+        self._word_futures: Dict[str, Future] = dict()
+        self._word_lock = threading.Lock()
+        self.pack_words = pack_words
+        self.pack_lim = pack_lim
+        self.pack_delimiter = pack_delimiter
+        self.metrics = metrics if metrics is not None else NULL_METRICS
+        self._executor = TranslationExecutor(max_workers = max_requests, rate = request_rate, retries = retries,
+                                             metrics = self.metrics)
+        self.transl_chunk_lim = transl_chunk_lim
         self.font_path = os.path.join(PACKAGE_PATH, font_path)
         self.page_sep = ''
         self.char_lim = char_lim
@@ -80,53 +141,158 @@ class LanguageDecoder(object):
         self.font_size = font_size
         self.pdf_w = pdf_w
         self.pdf_h = pdf_h
-        self._fpdf: FPDF
+        self._renderer = PdfRenderer(font_path = self.font_path, new_line = self.new_line, title_size = self.title_size,
+                                     font_size = self.font_size, pdf_w = self.pdf_w, pdf_h = self.pdf_h)
+        self._fpdf: 'FPDF'
 
-    def __init_fpdf__(self) -> FPDF:
-        self._fpdf = FPDF(format = 'A4', orientation = 'P', unit = 'mm')
-        self._fpdf.add_font(family = 'Noto', fname = self.font_path, uni = True)
-        self._fpdf.set_auto_page_break(auto = False, margin = 0)
-        self._fpdf.set_margins(left = -1, top = 1, right = -1)
+    def __init_fpdf__(self) -> 'FPDF':
+        # the font is parsed once per process, see `get_fpdf´
+        self._fpdf = self._renderer.new_document()
         return self._fpdf
 
+    @property
+    def _translator(self) -> TranslatorBackend:
+        if self._backend is None:
+            with self._backend_lock:
+                if self._backend is None:
+                    self._backend = get_backend(self.backend, source = self.source_language,
+                                                target = self.target_language, **self.backend_options)
+        return self._backend
+
     def get_supported_languages(self) -> List[str]:
+        from pprint import PrettyPrinter
         languages = self._translator.get_supported_languages(as_dict = True)
-        self._pp.pprint(languages)
+        PrettyPrinter(indent = 4).pprint(languages)
         return list(languages.values())
 
-    def translate(self, text: str) -> str:
+    def _call_translator(self, func: Callable, text: str) -> Optional[str]:
+        # run the translation call with rate limit and retries, errors are reported and result in None
+        self.metrics.count('requests')
+        self.metrics.count('chars', len(text))
         try:
-            return self._translator.translate(text)
-        except RequestError as exception:
+            return self._executor.call(func, text)
+        except Exception as exception:
+            self.metrics.count('errors', type = type(exception).__name__)
+            self._report_error(exception)
+        return None
+
+    @staticmethod
+    def _report_error(exception: Exception):
+        from deep_translator.exceptions import RequestError, TooManyRequests, MicrosoftAPIerror
+        if isinstance(exception, RequestError):
             print('Connection Error')
-            print(exception)
-        except TooManyRequests as exception:
+        elif isinstance(exception, TooManyRequests):
             print('To Many Requests')
-            print(exception)
-        except MicrosoftAPIerror as exception:
+        elif isinstance(exception, MicrosoftAPIerror):
             print('Microsoft API Error')
-            print(exception)
-        except Exception as exception:
+        else:
             print('Unexpected Error')
-            print(exception)
-            return ''
+        print(exception)
+
+    def translate(self, text: str) -> Optional[str]:
+        return self._call_translator(self._translator.translate, text)
+
+    def _translate_payload(self, payload: List[str]) -> List[Optional[str]]:
+        text = self._call_translator(self._translator.translate, join_payload(payload, delimiter = self.pack_delimiter))
+        if text is None:
+            # the request failed after all retries, single word requests would fail the same way
+            return [None] * len(payload)
+        decodes = split_payload(text, count = len(payload), delimiter = self.pack_delimiter)
+        if decodes is None:
+            # fallback to one request per word if the translation could not be split into aligned words
+            decodes = [self.translate(word) for word in payload]
+        return decodes
+
+    def translate_batch(self, batch: List[str]) -> List[Optional[str]]:
+        # failed translations are None to keep the results aligned with the batch
+        if self.pack_words:
+            payloads = pack_words(batch, char_lim = self.pack_lim, delimiter = self.pack_delimiter)
+            return [decode for decodes in self._executor.map(self._translate_payload, payloads) for decode in decodes]
+        return self._executor.map(self.translate, batch)
+
+    def _translate_chunk(self, chunk: str) -> Optional[str]:
+        decode = self._cache.get(source = self.source_language, target = self.target_language, word = chunk)
+        self.metrics.count('cache_hits' if decode is not None else 'cache_misses', kind = 'chunk')
+        if decode is None:
+            decode = self.translate(chunk)
+            if decode:
+                self._cache.set(source = self.source_language, target = self.target_language, word = chunk,
+                                decode = decode)
+        return decode
+
+    def translate_chunked(self, text: str, translations: Optional[Dict[str, str]] = None) -> Optional[str]:
+        # translate the text in sentence-bounded chunks concurrently, every chunk is cached
+        # optional known chunk translations (chunk hash -> translation) are used and updated
+        chunks = chunk_sentences(text, char_lim = self.transl_chunk_lim, anchor = self._is_anchor)
+        translations = translations if translations is not None else dict()
+        keys = [content_hash(chunk) for chunk in chunks]
+        missing = [(key, chunk) for key, chunk in zip(keys, chunks) if key not in translations]
+        decodes = self._executor.map(self._translate_chunk, [chunk for _, chunk in missing])
+        translations.update({key: decode for (key, _), decode in zip(missing, decodes) if decode is not None})
+        if any(decode is None for decode in decodes):
+            return
+        return ' '.join(translations[key] for key in keys)
 
-    def translate_batch(self, batch: List[str]) -> List[str]:
+    @staticmethod
+    def _is_anchor(sentence: str) -> bool:
+        # about every eighth sentence may end a chunk, independent of the position in the text
+        return zlib.crc32(sentence.strip().encode('utf-8')) % 8 == 0
+
+    def _translate_missing(self, keys: List[str]) -> Dict[str, Optional[str]]:
+        # translate the unique uncached words, words in flight of concurrent calls are translated once
+        owned, futures = list(), dict()
+        with self._word_lock:
+            for key in keys:
+                future = self._word_futures.get(key)
+                if future is None:
+                    future = self._word_futures[key] = Future()
+                    owned.append(key)
+                futures[key] = future
+        if len(owned) < len(keys):
+            self.metrics.count('words_coalesced', len(keys) - len(owned))
         try:
-            return self._translator.translate_batch(batch)
-        except RequestError as exception:
-            print('Connection Error')
-            print(exception)
-        except TooManyRequests as exception:
-            print('To Many Requests')
-            print(exception)
-        except MicrosoftAPIerror as exception:
-            print('Microsoft API Error')
-            print(exception)
+            if owned:
+                translations = dict(zip(owned, self.translate_batch(owned)))
+                # cache only successful translations, a rerun continues with the failed ones
+                self._cache.set_many(source = self.source_language, target = self.target_language,
+                                     translations = {key: decode for key, decode in translations.items() if decode})
+                for key in owned:
+                    futures[key].set_result(translations[key])
         except Exception as exception:
-            print('Unexpected Error')
-            print(exception)
-            return ['']
+            for key in owned:
+                if not futures[key].done():
+                    futures[key].set_exception(exception)
+            raise
+        finally:
+            with self._word_lock:
+                for key in owned:
+                    self._word_futures.pop(key, None)
+        return {key: futures[key].result() for key in keys}
+
+    def _translate_words(self, words: List[str], keep_failed: bool = False) -> Optional[List[str]]:
+        # translate only the unique words which are neither learned nor cached and scatter the results into word order,
+        # None if a translation failed (or the failed words are None with `keep_failed´)
+        keys = [self._cache.normalize(word) for word in words]
+        learned = self._lexicon.get_many(source = self.source_language, target = self.target_language, words = keys)
+        decodes = self._cache.get_many(source = self.source_language, target = self.target_language,
+                                       words = [key for key in keys if key not in learned])
+        missing = [key for key in dict.fromkeys(keys) if key not in decodes and key not in learned]
+        if learned:
+            print(f'Found {len(learned)} learned unique words.')
+            self.metrics.count('lexicon_hits', len(learned))
+        print(f'Found {len(decodes)} cached and {len(missing)} uncached unique words.')
+        self.metrics.count('cache_hits', len(decodes), kind = 'word')
+        self.metrics.count('cache_misses', len(missing), kind = 'word')
+        decodes.update(learned)
+        if missing:
+            translations = self._translate_missing(missing)
+            failed = sum(decode is None for decode in translations.values())
+            if failed:
+                print(f'Failed to translate {failed} words.')
+                if not keep_failed:
+                    return
+            decodes.update(translations)
+        return [decodes.get(key) for key in keys]
 
     @staticmethod
     def _lonlen(a_list: list) -> int:
@@ -135,7 +301,7 @@ class LanguageDecoder(object):
 
     @staticmethod
     def _replace_words(word_list: List[str], dictionary: dict) -> List[str]:
-        return [dictionary.get(word) if word in dictionary.keys() else word for word in word_list]
+        return PhraseCorrector(dictionary = dictionary).correct(word_list)
 
     @staticmethod
     def _get_decode_paths(source_path: str) -> Tuple[str, str]:
@@ -154,25 +320,33 @@ class LanguageDecoder(object):
         pdf_path = os.path.join(os.path.dirname(decode_path), f'{title}.pdf')
         return pdf_path, title
 
+    @staticmethod
+    def is_pdf_stale(decode_path: str) -> bool:
+        # the pdf exists, but is older than the decode text file
+        title = os.path.basename(decode_path).split('_')[0]
+        pdf_path = os.path.join(os.path.dirname(decode_path), f'{title}.pdf')
+        return os.path.isfile(decode_path) and os.path.isfile(pdf_path) and \
+            os.stat(pdf_path).st_mtime_ns < os.stat(decode_path).st_mtime_ns
+
     @staticmethod
     def delete_decoded_files(decode_path: str):
         transl_path = decode_path.replace('decode.txt', 'transl.txt')
-        if os.path.isfile(decode_path):
-            os.remove(decode_path)
-        if os.path.isfile(transl_path):
-            os.remove(transl_path)
+        # remove the decoded files and the leftovers of an incomplete streaming decode
+        sidecar_path = get_sidecar_path(decode_path = decode_path)
+        for path in [decode_path, transl_path, sidecar_path, get_manifest_path(decode_path = decode_path),
+                     f'{decode_path}.part', f'{transl_path}.part', f'{sidecar_path}.part', f'{decode_path}.ckpt']:
+            if os.path.isfile(path):
+                os.remove(path)
 
     @staticmethod
     def _add_missing_marks(source_word: str, decode_word: str) -> str:
         decode_word = source_word if decode_word is None else decode_word
         # get the number of marks in the beginning of the word
-        re_com = re.compile(f'^[{BEG_PATTERNS + QUO_PATTERNS}]*')
-        beg_num_s = len(re.search(re_com, source_word).group())
-        beg_num_d = len(re.search(re_com, decode_word).group())
+        beg_num_s = len(source_word) - len(source_word.lstrip(BEG_MARKS + QUO_MARKS))
+        beg_num_d = len(decode_word) - len(decode_word.lstrip(BEG_MARKS + QUO_MARKS))
         # get the number of marks in the end of the word
-        re_com = re.compile(f'[{END_PATTERNS + QUO_PATTERNS}]*$')
-        end_num_s = len(re.search(re_com, source_word).group())
-        end_num_d = len(re.search(re_com, decode_word).group())
+        end_num_s = len(source_word) - len(source_word.rstrip(END_MARKS + QUO_MARKS))
+        end_num_d = len(decode_word) - len(decode_word.rstrip(END_MARKS + QUO_MARKS))
         # if the end numbers are 0 get the length of the words
         end_num_s = -len(source_word) if end_num_s == 0 else end_num_s
         end_num_d = -len(decode_word) if end_num_d == 0 else end_num_d
@@ -182,127 +356,255 @@ class LanguageDecoder(object):
     @staticmethod
     def _split_camel_case(text: str) -> str:
         # 'camelCase' -> 'camel. Case'
-        i = 0
-        end = len(text) - 1
-        while i < end:
-            if text[i].islower() and text[i + 1].isupper():
-                text = f'{text[:i + 1]}. {text[i + 1:]}'
-                i += 2
-                end += 2
-            i += 1
-        return text
+        return split_camel_case(text)
 
     def text_formatting(self, text: str) -> str:
-        # remove superfluous whitespaces and new lines
-        text = ' '.join(text.split())
-        # replace special characters with common ones
-        for char in self.replace_dict.keys():
-            text = text.replace(char, self.replace_dict.get(char))
-        # swap "quotation marks" with punctuations if quotation mark is followed by punctuation
-        text = re.sub(f'([{QUO_PATTERNS}])\s*([{PUNCTUATIONS}])', r'\2\1', text)
-        # remove any white whitespaces after "begin marks" and add one whitespace before "begin marks"
-        text = re.sub(f'([{BEG_PATTERNS}])\s*', r' \1', text)
-        # remove any white whitespaces before "end marks" and add one whitespace after "end marks"
-        text = re.sub(f'\s*([{END_PATTERNS}])', r'\1 ', text)
-        # remove whitespaces inside "quotation mark" pairs and add whitespaces outside of pairs
-        text = re.sub(f'([{QUO_PATTERNS[0]}])\s*(.*?)\s*([{QUO_PATTERNS[0]}])', r' \1\2\3 ', text)
-        text = re.sub(f'([{QUO_PATTERNS[1]}])\s*(.*?)\s*([{QUO_PATTERNS[1]}])', r' \1\2\3 ', text)
-        text = re.sub(f'([{QUO_PATTERNS[2:]}])\s*(.*?)\s*([{QUO_PATTERNS[2:]}])', r' \1\2\3 ', text)
-        # add potentially missing dots
-        text = self._split_camel_case(text)
-        # add a dot at the end of the text in case of missing punctuation
-        if not any(punctuation in text.split()[-1] for punctuation in PUNCTUATIONS):
-            text += '.'
-        return ' '.join(text.split())
-
-    def decode_text(self, source_path: str, translate_text: bool = False) -> Optional[str]:
+        # single pass replacements and compiled mark handling, see `TextNormalizer´
+        return self._normalizer.normalize(text)
+
+    def learn_corrections(self, decode_path: str) -> int:
+        # learn the manual word corrections of the decode text file compared to the machine output of the sidecar
+        sidecar_path = get_sidecar_path(decode_path = decode_path)
+        if not os.path.isfile(decode_path) or not os.path.isfile(sidecar_path):
+            return 0
+        # the corrections are keyed on the machine output, a further edit replaces the former corrections
+        machine_sha256, decode_sha256 = file_sha256(sidecar_path), file_sha256(decode_path)
+        if load_aligned_pairs(decode_path = decode_path) is not None or \
+                self._lexicon.is_harvested(machine_sha256 = machine_sha256, decode_sha256 = decode_sha256):
+            return 0
+        corrections = diff_decode_file(decode_path = decode_path, machine_pairs = read_sidecar(sidecar_path))
+        if corrections is None:
+            print(f'Manual changes of `{decode_path}´ could not be aligned and are not learned.')
+            return 0
+        learned = self._lexicon.harvest(source = self.source_language, target = self.target_language,
+                                        corrections = corrections, machine_sha256 = machine_sha256,
+                                        decode_sha256 = decode_sha256)
+        print(f'Learned {learned} word corrections of `{decode_path}´.')
+        if learned and self.lexicon_path is None:
+            print('Warning: the learned word corrections are lost at exit without a lexicon path (--lexicon).')
+        return learned
+
+    def _adopt_manual_changes(self, decode_path: str, manifest: DecodeManifest):
+        # take over the manual changes of the decode text file into the manifest sentences (if still aligned)
+        if not os.path.isfile(get_sidecar_path(decode_path = decode_path)) or load_aligned_pairs(decode_path) is not None:
+            return
+        self.learn_corrections(decode_path = decode_path)
+        source_words = [source_word for source_word, _ in manifest.get_pairs()]
+        decode_words = align_decode_file(decode_path, source_words = source_words)
+        if decode_words is None:
+            print(f'Manual changes of `{decode_path}´ could not be aligned and are replaced.')
+            return
+        unaligned = sum(decode_word is None for decode_word in decode_words)
+        if unaligned:
+            print(f'Manual changes of {unaligned} words of `{decode_path}´ could not be aligned and are replaced.')
+        start = 0
+        for key in manifest.order:
+            source_words, machine_words = manifest.sentences[key]
+            edited_words = decode_words[start:start + len(source_words)]
+            manifest.sentences[key] = (source_words, [machine_word if edited_word is None else edited_word
+                                                      for machine_word, edited_word in zip(machine_words, edited_words)])
+            start += len(source_words)
+
+    def decode_text(self, source_path: str, translate_text: bool = False, stream: bool = False) -> Optional[str]:
         decode_path, transl_path = self._get_decode_paths(source_path = source_path)
 
-        if os.path.isfile(decode_path):
+        # the outputs are up to date if the source hash is unchanged (outputs without manifest are kept)
+        manifest = DecodeManifest(path = get_manifest_path(decode_path = decode_path),
+                                  source_language = self.source_language, target_language = self.target_language)
+        source_sha256 = file_sha256(source_path)
+        if os.path.isfile(decode_path) and (not manifest.load() or manifest.source_sha256 == source_sha256):
             # print(f'Text already decoded: `{decode_path}´. \n')
             return
 
+        if stream:
+            # the streaming mode resumes from its checkpoint and writes no manifest
+            if os.path.isfile(manifest.path):
+                os.remove(manifest.path)
+            return self._decode_text_stream(source_path = source_path, translate_text = translate_text)
+
         # read text file
-        with open(file = source_path, mode = 'r', encoding = 'utf-8') as file:
-            text = file.read()
+        with self.metrics.stage('read'):
+            with open(file = source_path, mode = 'r', encoding = 'utf-8') as file:
+                text = file.read()
+            if os.path.isfile(decode_path):
+                self._adopt_manual_changes(decode_path = decode_path, manifest = manifest)
 
         if len(text) == 0:
             print('Text is empty.\n')
             return
 
-        # formatting text for translator
-        source_text = self.text_formatting(text = text)
-        # split text into words
-        source_words = source_text.split()
+        with self.metrics.stage('format'):
+            # formatting text for translator
+            source_text = self.text_formatting(text = text)
+            # split text into sentences and words, only new or changed sentences are translated
+            sentences = split_sentences(source_text)
+            order = [content_hash(sentence.strip()) for sentence in sentences]
+        new_sentences = {key: sentence.split() for key, sentence in zip(order, sentences)
+                         if key not in manifest.sentences}
+        source_words = [source_word for words in new_sentences.values() for source_word in words]
         print(f'Decode Text for: `{source_path}´.')
-        print(f'Found {len(source_words)} words.')
-        decode_words = self.translate_batch(source_words)
-        if len(decode_words) != len(source_words):
+        print(f'Found {len(source_text.split())} words, {len(source_words)} in new or changed sentences.')
+        self.metrics.count('words', len(source_words))
+        with self.metrics.stage('translate'):
+            decode_words = self._translate_words(source_words)
+        if decode_words is None or len(decode_words) != len(source_words):
             print('Something went wrong with the translation.\n')
             return
-        decode_words = self._replace_words(word_list = decode_words, dictionary = self.dictionary)
+        with self.metrics.stage('correct'):
+            decode_words = self._corrector.correct(decode_words)
         print(f'Decoded words!\n')
 
         # formatting text
-        line_len = 0
-        source_line = ''
-        decode_line = ''
-        decode_text = ''
-        for source_word, decode_word in zip(source_words, decode_words):
-            decode_word = self._add_missing_marks(source_word = source_word, decode_word = decode_word)
-            # get the length of the longest word + word_space
-            word_len = self._lonlen([source_word, decode_word]) + self.word_space
-            # get the length of the current line
-            line_len += word_len
-            # if the length of the line is too long
-            if (line_len - self.word_space) > self.char_lim_decode:
-                # add self.new_line at the end
-                source_line = f'{source_line[0:-self.word_space]}{self.new_line}'
-                decode_line = f'{decode_line[0:-self.word_space]}{self.new_line}'
-                # combine to formatted text
-                decode_text = f'{decode_text}{source_line}{decode_line}{self.new_line}'
-                # set length to word length
-                line_len = word_len
-                # adjust word for same length, add word_space and add it to the line
-                source_line = source_word.ljust(word_len, ' ')
-                decode_line = decode_word.ljust(word_len, ' ')
-            # if a punctuation mark is at the end of the word (end of sentence)
-            elif any(punctuation in source_word for punctuation in PUNCTUATIONS):
-                # add word to the line and add self.new_line at the end
-                source_line = f'{source_line}{source_word}{self.new_line}'
-                decode_line = f'{decode_line}{decode_word}{self.new_line}'
-                # combine to formatted text
-                decode_text = f'{decode_text}{source_line}{decode_line}{self.new_line}'
-                # reset length and lines
-                line_len = 0
-                source_line = ''
-                decode_line = ''
-            else:
-                # adjust word for same length, add word_space and add it to the line
-                source_line += source_word.ljust(word_len, ' ')
-                decode_line += decode_word.ljust(word_len, ' ')
+        with self.metrics.stage('layout'):
+            decode_words = [self._add_missing_marks(source_word = source_word, decode_word = decode_word)
+                            for source_word, decode_word in zip(source_words, decode_words)]
+            start = 0
+            for key, words in new_sentences.items():
+                manifest.sentences[key] = (words, decode_words[start:start + len(words)])
+                start += len(words)
+            pairs = manifest.get_pairs(order = order)
+            decode_text = write_decode_text(pairs, char_lim = self.char_lim_decode, word_space = self.word_space,
+                                            new_line = self.new_line)
 
         # save decoded text
-        with open(file = decode_path, mode = 'w', encoding = 'utf-8') as file:
-            file.write(decode_text)
-
+        with self.metrics.stage('write'):
+            with open(file = decode_path, mode = 'w', encoding = 'utf-8') as file:
+                file.write(decode_text)
+            # save the aligned pairs for `convert2pdf´
+            write_sidecar(sidecar_path = get_sidecar_path(decode_path = decode_path), decode_path = decode_path,
+                          pairs = pairs)
+
+        chunk_keys = None
         if translate_text:
-            transl_text = self.translate(source_text)
-            transl_text = textwrap.fill(transl_text, width = self.char_lim_decode)
-            # save translated text
-            with open(file = transl_path, mode = 'w', encoding = 'utf-8') as file:
-                file.write(transl_text)
-
+            with self.metrics.stage('translate'):
+                transl_text = self.translate_chunked(source_text, translations = manifest.translations)
+            chunk_keys = list(manifest.translations.keys()) if transl_text is None else \
+                [content_hash(chunk) for chunk in chunk_sentences(source_text, char_lim = self.transl_chunk_lim,
+                                                                  anchor = self._is_anchor)]
+            if transl_text is None:
+                print('Something went wrong with the translation.\n')
+            else:
+                transl_text = textwrap.fill(transl_text, width = self.char_lim_decode)
+                # save translated text
+                with self.metrics.stage('write'), open(file = transl_path, mode = 'w', encoding = 'utf-8') as file:
+                    file.write(transl_text)
+        with self.metrics.stage('write'):
+            manifest.save(source_sha256 = source_sha256, order = order, chunk_keys = chunk_keys)
+
+        # the pdf of the former decode text is regenerated by the caller, see `is_pdf_stale´
+        if self.is_pdf_stale(decode_path = decode_path):
+            print(f'PDF of `{decode_path}´ is outdated.')
         return decode_path
 
-    def convert2pdf(self, decode_path: str) -> Optional[str]:
-        pdf_path, title = self._get_pdf_paths(decode_path = decode_path)
+    def _count_quotes(self, source_path: str, offset: int = 0) -> List[int]:
+        # count the quotation marks of every kind in the text file from the byte offset (line by line)
+        counts = self._normalizer.count_quotes('')
+        with open(file = source_path, mode = 'rb') as raw:
+            raw.seek(offset)
+            for line in io.TextIOWrapper(raw, encoding = 'utf-8', newline = ''):
+                counts = [count + line_count for count, line_count in zip(counts, self._normalizer.count_quotes(line))]
+        return counts
+
+    def _format_chunks(self, chunks: Iterator[Tuple[str, int]], size: int, opened: int = 0,
+                       remaining: List[int] = None) -> Iterator[Tuple[str, int, int]]:
+        # format every chunk as a part of the whole text: with the quotation mark pairs `opened´ in the chunks before,
+        # the `remaining´ quotation marks of the text and only the last chunk (at the end of the file of `size´ bytes)
+        # gets a missing final punctuation
+        remaining = remaining if remaining is not None else self._normalizer.count_quotes('')
+        for chunk, offset in chunks:
+            counts = self._normalizer.count_quotes(chunk)
+            remaining = [count - chunk_count for count, chunk_count in zip(remaining, counts)]
+            closed = sum(1 << i for i, count in enumerate(remaining) if count > 0)
+            # chunks without words are passed as empty text to record their offset
+            with self.metrics.stage('format'):
+                source_text = self._normalizer.normalize(chunk, final = offset >= size, opened = opened,
+                                                         closed = closed) if chunk.strip() else ''
+            opened ^= sum(1 << i for i, count in enumerate(counts) if count % 2)
+            yield source_text, offset, opened
+
+    def _translate_chunks(self, chunks: Iterator[Tuple[str, int, int]]) -> \
+            Iterator[Tuple[str, List[str], List[str], int, int]]:
+        for source_text, offset, quotes in chunks:
+            source_words = source_text.split()
+            self.metrics.count('words', len(source_words))
+            with self.metrics.stage('translate'):
+                decode_words = self._translate_words(source_words)
+            if decode_words is None or len(decode_words) != len(source_words):
+                print('Something went wrong with the translation.\n')
+                return
+            with self.metrics.stage('correct'):
+                decode_words = self._corrector.correct(decode_words)
+            decode_words = [self._add_missing_marks(source_word = source_word, decode_word = decode_word)
+                            for source_word, decode_word in zip(source_words, decode_words)]
+            yield source_text, source_words, decode_words, offset, quotes
+
+    def _decode_text_stream(self, source_path: str, translate_text: bool = False,
+                            chunk_chars: int = 50000) -> Optional[str]:
+        # decode the text chunk by chunk in a generator pipeline (format -> translate -> layout -> append-write)
+        decode_path, transl_path = self._get_decode_paths(source_path = source_path)
+        if os.path.getsize(source_path) == 0:
+            print('Text is empty.\n')
+            return
 
-        if os.path.isfile(pdf_path):
-            # print(f'PDF already created: `{pdf_path}´\n')
+        # resume from the last completed chunk of a valid checkpoint
+        checkpoint = Checkpoint(path = f'{decode_path}.ckpt', source_path = source_path)
+        if checkpoint.load():
+            print(f'Resume decoding of `{source_path}´ at byte {checkpoint.offset}.')
+        print(f'Decode Text for: `{source_path}´.')
+        sidecar_path = get_sidecar_path(decode_path = decode_path)
+        partial_paths = {'decode': f'{decode_path}.part', 'pairs': f'{sidecar_path}.part',
+                         'transl': f'{transl_path}.part'}
+        files = {key: open_partial(path = path, size = checkpoint.sizes.get(key))
+                 for key, path in partial_paths.items() if key != 'transl' or translate_text}
+
+        # the chunks are formatted as the whole text, see `_format_chunks´
+        chunks = read_sentence_chunks(source_path = source_path, offset = checkpoint.offset, chunk_chars = chunk_chars,
+                                      quoted = self._normalizer.has_quotes)
+        chunks = self._format_chunks(chunks, size = os.path.getsize(source_path), opened = checkpoint.quotes,
+                                     remaining = self._count_quotes(source_path = source_path, offset = checkpoint.offset))
+        completed = True
+        try:
+            for source_text, source_words, decode_words, offset, quotes in self._translate_chunks(chunks):
+                # the layout is written to the file while it is generated (layout and write in one stage)
+                with self.metrics.stage('write'):
+                    write_decode_text(zip(source_words, decode_words), char_lim = self.char_lim_decode,
+                                      word_space = self.word_space, new_line = self.new_line, file = files['decode'])
+                    write_pairs(file = files['pairs'], pairs = zip(source_words, decode_words))
+                if translate_text and source_text:
+                    with self.metrics.stage('translate'):
+                        transl_text = self.translate_chunked(source_text)
+                    if transl_text is None:
+                        print('Something went wrong with the translation.\n')
+                        completed = False
+                        break
+                    files['transl'].write(f'{textwrap.fill(transl_text, width = self.char_lim_decode)}\n')
+                # record the checkpoint after the chunk is written completely
+                for file in files.values():
+                    file.flush()
+                checkpoint.save(offset = offset, sizes = {key: file.buffer.tell() for key, file in files.items()},
+                                quotes = quotes)
+                print(f'Decoded {len(source_words)} words up to byte {offset}.')
+            else:
+                completed = checkpoint.offset == os.path.getsize(source_path)
+        finally:
+            for file in files.values():
+                file.close()
+
+        if not completed:
+            print(f'Decoding incomplete, rerun to resume at byte {checkpoint.offset}.\n')
             return
-        print(f'Create PDF for: `{decode_path}´.')
+        # the complete output files replace the partial ones
+        os.replace(partial_paths['decode'], decode_path)
+        os.replace(partial_paths['pairs'], sidecar_path)
+        seal_sidecar(sidecar_path = sidecar_path, decode_path = decode_path)
+        if translate_text:
+            os.replace(partial_paths['transl'], transl_path)
+        checkpoint.remove()
+        print(f'Decoded words!\n')
+        return decode_path
 
+    @staticmethod
+    def _parse_decode_file(decode_path: str) -> List[Tuple[str, str]]:
         # read text file as lines
         with open(file = decode_path, mode = 'r', encoding = 'utf-8') as file:
             lines = file.readlines()
@@ -315,34 +617,30 @@ class LanguageDecoder(object):
                 source_words += line.split()
             if l % 3 == 1:
                 decode_words += line.split()
+        return list(zip(source_words, decode_words))
 
-        # formatting text
-        line_len = 0
-        source_line = ''
-        decode_line = ''
-        pdf_lines = list()
-        for source_word, decode_word in zip(source_words, decode_words):
-            # get the length of the longest word + word_space
-            word_len = self._lonlen([source_word, decode_word]) + self.word_space
-            # get the length of the current line
-            line_len += word_len
-            # if the length of the line is too long
-            if (line_len - self.word_space) > self.char_lim:
-                # replace the word_space with self.new_line and append to pdf lines
-                pdf_lines.append(f'{source_line[0:-self.word_space]}{self.new_line}')
-                pdf_lines.append(f'{decode_line[0:-self.word_space]}{self.new_line}')
-                pdf_lines.append(self.new_line)
-                # reset length and lines
-                line_len = word_len
-                source_line = ''
-                decode_line = ''
-            # adjust word for same length, add word_space and add it to the line
-            source_line += source_word.ljust(word_len, ' ')
-            decode_line += decode_word.ljust(word_len, ' ')
-        # if the loop is finished create the last lines
-        pdf_lines.append(f'{source_line[0:-self.word_space]}{self.new_line}')
-        pdf_lines.append(f'{decode_line[0:-self.word_space]}{self.new_line}')
-        pdf_lines.append(self.new_line)
+    def convert2pdf(self, decode_path: str, update: bool = False, learn: bool = True) -> Optional[str]:
+        # with `update´ a stale pdf is regenerated (the decode text file was rewritten after the pdf) and with `learn´
+        # the manual corrections of the decode text file are learned (see `learn_corrections´)
+        pdf_path, title = self._get_pdf_paths(decode_path = decode_path)
+
+        if os.path.isfile(pdf_path) and not (update and self.is_pdf_stale(decode_path = decode_path)):
+            # print(f'PDF already created: `{pdf_path}´\n')
+            return
+        print(f'Create PDF for: `{decode_path}´.')
+
+        # use the aligned pairs of the sidecar, unless the decode text file was edited
+        with self.metrics.stage('read'):
+            pairs = load_aligned_pairs(decode_path = decode_path)
+            if pairs is None:
+                if learn:
+                    self.learn_corrections(decode_path = decode_path)
+                pairs = self._parse_decode_file(decode_path = decode_path)
+
+        # formatting text, the lazily read sidecar pairs are consumed in the layout
+        with self.metrics.stage('layout'):
+            pdf_lines = get_page_lines(pairs, char_lim = self.char_lim, word_space = self.word_space,
+                                       new_line = self.new_line)
 
         # create pages
         lines_len = len(pdf_lines)
@@ -358,51 +656,8 @@ class LanguageDecoder(object):
             completed_lines += self.line_lim
         print(f'Convert {lines_len} lines of formatted text to pdf with {len(pages)} pages.\n')
 
-        # formatting pdf
-        first_page = True
-        self.__init_fpdf__()
-        pdf_title = f'    {title}'
-        for p, page in enumerate(pages):
-            self._fpdf.add_page()
-            if first_page:
-                # add the title to the top of the first front page
-                self._fpdf.set_font(family = 'Noto', size = self.title_size)
-                self._fpdf.cell(ln = 1, txt = pdf_title, align = 'L', w = self.pdf_w, h = self.pdf_h)
-                self._fpdf.cell(ln = 1, txt = '', align = 'L', w = self.pdf_w, h = self.pdf_h)
-                self._fpdf.cell(ln = 1, txt = '', align = 'L', w = self.pdf_w, h = self.pdf_h)
-                self._fpdf.set_font(family = 'Noto', size = self.font_size)
-                first_page = False
-            elif 0.5 * p % 2 < 1.:  # front page
-                # add space to the top of the front page
-                self._fpdf.set_font(family = 'Noto', size = self.font_size)
-                self._fpdf.cell(ln = 1, txt = '', align = 'L', w = self.pdf_w, h = self.pdf_h)
-                self._fpdf.cell(ln = 1, txt = '', align = 'L', w = self.pdf_w, h = self.pdf_h)
-                self._fpdf.cell(ln = 1, txt = '', align = 'L', w = self.pdf_w, h = self.pdf_h)
-            # write the formatted page
-            self._fpdf.multi_cell(txt = page, align = 'L', w = self.pdf_w, h = self.pdf_h)
-            if 0.5 * p % 2 > 1.:  # back page
-                # add space to the end of the back page
-                self._fpdf.set_font(family = 'Noto', size = self.font_size)
-                self._fpdf.cell(ln = 1, txt = '', align = 'L', w = self.pdf_w, h = self.pdf_h)
-                self._fpdf.cell(ln = 1, txt = '', align = 'L', w = self.pdf_w, h = self.pdf_h)
-                self._fpdf.cell(ln = 1, txt = '', align = 'L', w = self.pdf_w, h = self.pdf_h)
         # create pdf
-        self._fpdf.output(pdf_path)
+        with self.metrics.stage('render'):
+            self._renderer.render(pages = pages, title = title, pdf_path = pdf_path)
+        self.metrics.count('pages', len(pages))
         return pdf_path
-
-
-if __name__ == "__main__":
-    # Initialise language decoder.
-    language_decoder = LanguageDecoder(source_language = 'ru', target_language = 'de',
-                                       replace_dict = REPLACEMENTS, dictionary = RU2DE)
-    # Get supported languages.
-    language_decoder.get_supported_languages()
-    # Define source path to text file.
-    source_path = 'C:/Users/User/source/text.txt'
-    # Decoding text (takes a while).
-    decode_path = language_decoder.decode_text(source_path = source_path, translate_text = True)
-    # Check the decoding translation manually before converting to pdf, because word by word translation is pretty bad!
-    # Create a pdf file from the decoding
-    pdf_path = language_decoder.convert2pdf(decode_path = decode_path)
-    # Optional remove decoded and translated text files.
-    # language_decoder.delete_decoded_files(decode_path = decode_path)
@@ -0,0 +1,99 @@
+import io
+import copy
+import threading
+from typing import List, Dict, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from fpdf import FPDF
+
+# the parsed font templates of this process (font path -> empty FPDF with the font added, font file bytes)
+_TEMPLATES: Dict[str, Tuple['FPDF', bytes]] = dict()
+_TEMPLATES_LOCK = threading.Lock()
+
+
+def get_fpdf(font_path: str) -> 'FPDF':
+    # get a new FPDF with the font, the font metrics are parsed once per process and copied from the template
+    # fpdf is imported on the first use, a decode-only process never loads it
+    from fpdf import FPDF
+    with _TEMPLATES_LOCK:
+        if font_path not in _TEMPLATES:
+            template = FPDF(format = 'A4', orientation = 'P', unit = 'mm')
+            template.add_font(family = 'Noto', fname = font_path, uni = True)
+            template.set_auto_page_break(auto = False, margin = 0)
+            template.set_margins(left = -1, top = 1, right = -1)
+            with open(file = font_path, mode = 'rb') as file:
+                _TEMPLATES[font_path] = template, file.read()
+        template, font_data = _TEMPLATES[font_path]
+    fpdf = copy.deepcopy(template)
+    for font in fpdf.fonts.values():
+        # fpdf2 shares the fontTools font between copies and subsets it in place on output,
+        # so every document gets its own lazily loaded fontTools font from the cached file bytes
+        if getattr(font, 'ttfont', None) is not None:
+            from fontTools.ttLib import TTFont
+            font.ttfont = TTFont(io.BytesIO(font_data), recalcTimestamp = False, lazy = True)
+    return fpdf
+
+
+class PdfRenderer(object):
+    """
+    The PdfRenderer writes pre-laid-out monospace pages to a pdf file.
+    Every line is written as a single cell without re-measuring or re-wrapping the text.
+    """
+
+    def __init__(self,
+                 font_path: str,
+                 new_line: str = '\n',
+                 title_size: int = 24,
+                 font_size: int = 13.4,
+                 pdf_w: float = 215.,
+                 pdf_h: float = 5.28):
+
+        """
+        :param font_path: path to the font used for the pdf (monospace font recommended)
+        :param new_line: new line string
+        :param title_size: font size of the title (max: 24)
+        :param font_size: font size of the text (max: 13.4)
+        :param pdf_w: width of the pdf text field (min 215)
+        :param pdf_h: height for each pdf line (5.18 - 5.28)
+        """
+
+        self.font_path = font_path
+        self.new_line = new_line
+        self.title_size = title_size
+        self.font_size = font_size
+        self.pdf_w = pdf_w
+        self.pdf_h = pdf_h
+        self.rendered_pages = 0
+
+    def new_document(self) -> 'FPDF':
+        return get_fpdf(font_path = self.font_path)
+
+    def _write_lines(self, fpdf: 'FPDF', lines: List[str]):
+        for line in lines:
+            fpdf.cell(ln = 1, txt = line, align = 'L', w = self.pdf_w, h = self.pdf_h)
+
+    def render(self, pages: List[str], title: str, pdf_path: str) -> int:
+        # render the pages (lines separated by new_line) to the pdf file and return the number of pages
+        fpdf = self.new_document()
+        empty_lines = ['', '', '']
+        for p, page in enumerate(pages):
+            fpdf.add_page()
+            if p == 0:
+                # add the title to the top of the first front page
+                fpdf.set_font(family = 'Noto', size = self.title_size)
+                self._write_lines(fpdf, [f'    {title}', '', ''])
+                fpdf.set_font(family = 'Noto', size = self.font_size)
+            elif 0.5 * p % 2 < 1.:  # front page
+                # add space to the top of the front page
+                fpdf.set_font(family = 'Noto', size = self.font_size)
+                self._write_lines(fpdf, empty_lines)
+            # write the formatted page line by line
+            self._write_lines(fpdf, page.split(self.new_line))
+            if 0.5 * p % 2 > 1.:  # back page
+                # add space to the end of the back page
+                fpdf.set_font(family = 'Noto', size = self.font_size)
+                self._write_lines(fpdf, empty_lines)
+        # create pdf
+        fpdf.output(pdf_path)
+        self.rendered_pages += len(pages)
+        return len(pages)
@@ -0,0 +1,71 @@
+from typing import Dict, List, Optional
+
+# the key of the replacement in a trie node (words never contain whitespaces)
+_REPLACEMENT = ' '
+
+
+class PhraseCorrector(object):
+    """
+    The PhraseCorrector corrects common translation mistakes of the decoded words with a dictionary.
+    The dictionary is compiled once into a word trie, so multi-word phrases (e.g. 'Ich bin') are matched
+    with longest-match semantics in a single pass and the lookup time does not depend on the dictionary size.
+    """
+
+    def __init__(self, dictionary: Optional[Dict[str, str]] = None):
+        """
+        :param dictionary: a dictionary to correct common translation mistakes (phrase -> correction)
+        """
+
+        self._trie = dict()
+        self.size = 0
+        if isinstance(dictionary, dict):
+            for phrase, correction in dictionary.items():
+                self.add(phrase = phrase, correction = correction)
+
+    def add(self, phrase: str, correction: str):
+        words = phrase.split()
+        if not words:
+            return
+        node = self._trie
+        for word in words:
+            node = node.setdefault(word, dict())
+        self.size += _REPLACEMENT not in node
+        node[_REPLACEMENT] = correction
+
+    def correct_words(self, words: List[str], min_words: int = 1) -> List[str]:
+        # replace the longest matching phrase of at least `min_words´ words at every position
+        corrected = list()
+        i = 0
+        while i < len(words):
+            node = self._trie.get(words[i])
+            match_end, correction = i + 1, None
+            j = i + 1
+            while node is not None:
+                if _REPLACEMENT in node and j - i >= min_words:
+                    match_end, correction = j, node[_REPLACEMENT]
+                if j == len(words):
+                    break
+                node = node.get(words[j])
+                j += 1
+            if correction is None:
+                corrected.append(words[i])
+            elif correction:
+                corrected.append(correction)
+            i = match_end
+        return corrected
+
+    def correct(self, tokens: List[Optional[str]]) -> List[Optional[str]]:
+        # correct every decoded token, the phrases are matched inside a token to keep it aligned to its source word
+        corrected = list()
+        for token in tokens:
+            if not token or not self._trie:
+                corrected.append(token)
+            elif ' ' not in token:
+                # fast path for single words
+                node = self._trie.get(token)
+                correction = None if node is None else node.get(_REPLACEMENT)
+                corrected.append(token if correction is None else correction)
+            else:
+                # the single word corrections are meant for whole one-word tokens (e.g. 'Tat' but not 'In der Tat')
+                corrected.append(' '.join(self.correct_words(token.split(), min_words = 2)))
+        return corrected
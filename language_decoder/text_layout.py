@@ -0,0 +1,85 @@
+import io
+from typing import Iterable, Iterator, Tuple, List, Optional, TextIO
+from .dictionaries import PUNCTUATIONS
+
+
+def layout_pairs(pairs: Iterable[Tuple[str, str]],
+                 char_lim: int,
+                 word_space: int = 4,
+                 break_on_punctuation: bool = False,
+                 flush_empty: bool = False) -> Iterator[Tuple[str, str]]:
+    """
+    Lay out aligned (source word, decode word) pairs into aligned (source line, decode line) pairs in linear time.
+    Every word is padded to the length of the longer word of its pair plus the word space.
+    :param pairs: the aligned (source word, decode word) pairs
+    :param char_lim: character limit of one line
+    :param word_space: the space between two words
+    :param break_on_punctuation: optional line break after every word containing a punctuation (end of sentence)
+    :param flush_empty: optional yield of the last line pair even if it is empty
+    """
+
+    punctuations = frozenset(PUNCTUATIONS)
+    line_len = 0
+    source_line: List[str] = list()
+    decode_line: List[str] = list()
+    for source_word, decode_word in pairs:
+        # get the length of the longest word + word_space
+        word_len = max(len(source_word), len(decode_word)) + word_space
+        # get the length of the current line
+        line_len += word_len
+        # if the length of the line is too long
+        if (line_len - word_space) > char_lim:
+            # yield the line without the word_space at the end
+            yield _join_line(source_line, word_space), _join_line(decode_line, word_space)
+            # set length to word length and start a new line with the word
+            line_len = word_len
+            source_line = [source_word.ljust(word_len, ' ')]
+            decode_line = [decode_word.ljust(word_len, ' ')]
+        # if a punctuation mark is in the word (end of sentence)
+        elif break_on_punctuation and not punctuations.isdisjoint(source_word):
+            # yield the line with the word without word_space at the end
+            source_line.append(source_word)
+            decode_line.append(decode_word)
+            yield ''.join(source_line), ''.join(decode_line)
+            # reset length and lines
+            line_len = 0
+            source_line = list()
+            decode_line = list()
+        else:
+            # adjust word for same length, add word_space and add it to the line
+            source_line.append(source_word.ljust(word_len, ' '))
+            decode_line.append(decode_word.ljust(word_len, ' '))
+    if source_line or flush_empty:
+        yield _join_line(source_line, word_space), _join_line(decode_line, word_space)
+
+
+def _join_line(words: List[str], word_space: int) -> str:
+    # join the padded words and remove the word_space at the end
+    line = ''.join(words)
+    return line[:max(len(line) - word_space, 0)]
+
+
+def write_decode_text(pairs: Iterable[Tuple[str, str]],
+                      char_lim: int,
+                      word_space: int = 4,
+                      new_line: str = '\n',
+                      file: Optional[TextIO] = None) -> Optional[str]:
+    # write the decode text layout (source line, decode line, empty line) to the file or return it as string
+    writer = io.StringIO() if file is None else file
+    for source_line, decode_line in layout_pairs(pairs, char_lim = char_lim, word_space = word_space,
+                                                 break_on_punctuation = True):
+        writer.write(f'{source_line}{new_line}{decode_line}{new_line}{new_line}')
+    if file is None:
+        return writer.getvalue()
+
+
+def get_page_lines(pairs: Iterable[Tuple[str, str]],
+                   char_lim: int,
+                   word_space: int = 4,
+                   new_line: str = '\n') -> List[str]:
+    # get the pdf layout lines (source line, decode line, empty line) each ending with new_line
+    lines = list()
+    for source_line, decode_line in layout_pairs(pairs, char_lim = char_lim, word_space = word_space,
+                                                 flush_empty = True):
+        lines += [f'{source_line}{new_line}', f'{decode_line}{new_line}', new_line]
+    return lines
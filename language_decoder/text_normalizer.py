@@ -0,0 +1,126 @@
+import re
+from functools import lru_cache
+from typing import Dict, Optional, List
+from .dictionaries import PUNCTUATIONS, BEG_PATTERNS, END_PATTERNS, QUO_PATTERNS
+
+# the pattern sets as plain characters (without the regex escapes)
+BEG_MARKS = BEG_PATTERNS.replace('\\', '')
+END_MARKS = END_PATTERNS.replace('\\', '')
+QUO_MARKS = QUO_PATTERNS.replace('\\', '')
+
+
+@lru_cache(maxsize = None)
+def _get_camel_case_pattern() -> re.Pattern:
+    # a regex matching the positions between a lowercase and an uppercase character of the BMP
+    lower, upper = list(), list()
+    for code in range(0x10000):
+        char = chr(code)
+        if char.islower():
+            lower.append(re.escape(char))
+        elif char.isupper():
+            upper.append(re.escape(char))
+    return re.compile(f'(?<=[{"".join(lower)}])(?=[{"".join(upper)}])')
+
+
+def split_camel_case(text: str) -> str:
+    # 'camelCase' -> 'camel. Case'
+    if not text or max(text) <= '\uffff':
+        return _get_camel_case_pattern().sub('. ', text)
+    # texts with characters outside the BMP are split character by character
+    chars = list()
+    for i, char in enumerate(text):
+        chars.append(char)
+        if char.islower() and i + 1 < len(text) and text[i + 1].isupper():
+            chars.append('. ')
+    return ''.join(chars)
+
+
+class TextNormalizer(object):
+    """
+    The TextNormalizer formats a text for the translator. It is compiled once from the pattern sets
+    and the replacement dict and replaces all characters of the replacement dict in a single pass.
+    """
+
+    def __init__(self, replace_dict: Optional[Dict[str, str]] = None):
+        """
+        :param replace_dict: a dictionary to replace marks
+        """
+
+        self.replace_dict = replace_dict if isinstance(replace_dict, dict) else dict()
+        keys = [key for key in self.replace_dict.keys() if key]
+        # a single pass replacement is only equal to sequential replacements if the keys do not interact
+        self._sequential = any(key != other and key in other for key in keys for other in keys) or \
+            any(key in value for key in keys for value in self.replace_dict.values())
+        self._re_replace = re.compile('|'.join(re.escape(key) for key in sorted(keys, key = len, reverse = True))) \
+            if keys else None
+        # swap "quotation marks" with punctuations if quotation mark is followed by punctuation
+        self._re_swap = re.compile(f'([{QUO_PATTERNS}])\\s*([{PUNCTUATIONS}])')
+        # one whitespace before "begin marks" and one whitespace after "end marks"
+        self._re_marks = re.compile(f'([{BEG_PATTERNS}])\\s*|\\s*([{END_PATTERNS}])')
+        # remove whitespaces inside "quotation mark" pairs and add whitespaces outside of pairs
+        self._quotes = [QUO_PATTERNS[0], QUO_PATTERNS[1], QUO_PATTERNS[2:]]
+        self._re_quotes = [re.compile(f'([{quotes}])\\s*(.*?)\\s*([{quotes}])') for quotes in self._quotes]
+        self._re_quote = [re.compile(f'[{quotes}]') for quotes in self._quotes]
+        self._re_quote_marks = re.compile(f'[{QUO_PATTERNS}]')
+        self._punctuations = frozenset(PUNCTUATIONS)
+
+    def replace(self, text: str) -> str:
+        if self._re_replace is None:
+            return text
+        if self._sequential:
+            for char in self.replace_dict.keys():
+                text = text.replace(char, self.replace_dict.get(char))
+            return text
+        return self._re_replace.sub(lambda match: self.replace_dict[match.group()], text)
+
+    @staticmethod
+    def _space_marks(match: re.Match) -> str:
+        return f' {match.group(1)}' if match.group(1) is not None else f'{match.group(2)} '
+
+    def count_quotes(self, text: str) -> List[int]:
+        # get the number of "quotation marks" of every kind in the text (after the replacements)
+        text = self.replace(text)
+        return [sum(text.count(quote) for quote in quotes) for quotes in self._quotes]
+
+    def has_quotes(self, text: str) -> bool:
+        # the text contains "quotation marks" (after the replacements)
+        return self._re_quote_marks.search(self.replace(text)) is not None
+
+    def _pair_quotes(self, text: str, i: int, opened: bool, closed: bool) -> str:
+        # pair the "quotation marks" of one kind, the first mark closes a pair opened before the text (`opened´)
+        # and the last unpaired mark opens a pair closed after the text (`closed´)
+        head = ''
+        if opened:
+            match = self._re_quote[i].search(text)
+            if match is None:
+                return text
+            head, text = f'{text[:match.start()].rstrip()}{match.group()} ', text[match.end():]
+        text = self._re_quotes[i].sub(r' \1\2\3 ', text)
+        if closed and sum(text.count(quote) for quote in self._quotes[i]) % 2:
+            k = max(text.rfind(quote) for quote in self._quotes[i])
+            text = f'{text[:k]} {text[k]}{text[k + 1:].lstrip()}'
+        return head + text
+
+    def normalize(self, text: str, final: bool = True, opened: int = 0, closed: int = 0) -> str:
+        # a part of a whole text is formatted as in the whole text with `final´ (the part ends the text) and the
+        # bit masks of the "quotation mark" kinds with a pair `opened´ before the part or marks `closed´ after it
+        # remove superfluous whitespaces and new lines
+        text = ' '.join(text.split())
+        # replace special characters with common ones
+        text = self.replace(text)
+        text = self._re_swap.sub(r'\2\1', text)
+        text = self._re_marks.sub(self._space_marks, text)
+        for i, re_quotes in enumerate(self._re_quotes):
+            if (opened | closed) >> i & 1:
+                text = self._pair_quotes(text, i, opened = bool(opened >> i & 1), closed = bool(closed >> i & 1))
+            else:
+                text = re_quotes.sub(r' \1\2\3 ', text)
+        # add potentially missing dots
+        text = split_camel_case(text)
+        # add a dot at the end of the text in case of missing punctuation (not to a part of a text)
+        last_word = text.rsplit(None, 1)[-1] if text.strip() else ''
+        if final and self._punctuations.isdisjoint(last_word):
+            text += '.'
+        return ' '.join(text.split())
+
+    __call__ = normalize
@@ -0,0 +1,154 @@
+import io
+import os
+import re
+import json
+from typing import Iterator, Tuple, Optional, List, Callable
+from .dictionaries import PUNCTUATIONS, END_PATTERNS, QUO_PATTERNS
+
+# the end of a sentence: a punctuation followed by closing marks and a whitespace
+SENTENCE_END = re.compile(f'[{PUNCTUATIONS}][{END_PATTERNS}{QUO_PATTERNS}»”]*\\s+')
+# a sentence starting with an end mark is joined to the sentence before by the text formatting
+_END_MARKS = frozenset(END_PATTERNS.replace('\\', ''))
+_PUNCTUATIONS = frozenset(PUNCTUATIONS)
+_WORD = re.compile(r'\S+')
+
+
+def split_sentences(text: str) -> List[str]:
+    # split the text after every sentence end, the whitespaces stay at the end of the sentences
+    sentences, start = list(), 0
+    for match in SENTENCE_END.finditer(text):
+        sentences.append(text[start:match.end()])
+        start = match.end()
+    if start < len(text):
+        sentences.append(text[start:])
+    return sentences
+
+
+def chunk_sentences(text: str, char_lim: int = 4500, anchor: Optional[Callable[[str], bool]] = None) -> List[str]:
+    # pack complete sentences into chunks up to the character limit, longer sentences are split at whitespaces
+    # optional content defined chunks: a chunk filled to half ends after an anchor sentence, so the chunks
+    # before and after an edited sentence stay the same
+    chunks, chunk = list(), ''
+    for sentence in split_sentences(text):
+        while len(sentence) > char_lim:
+            end = sentence.rfind(' ', 0, char_lim) + 1
+            end = end if end > 0 else char_lim
+            if chunk:
+                chunks.append(chunk)
+                chunk = ''
+            chunks.append(sentence[:end])
+            sentence = sentence[end:]
+        if len(chunk) + len(sentence) > char_lim:
+            chunks.append(chunk)
+            chunk = ''
+        chunk += sentence
+        if anchor is not None and len(chunk) >= char_lim // 2 and anchor(sentence):
+            chunks.append(chunk)
+            chunk = ''
+    if chunk.strip():
+        chunks.append(chunk)
+    return [chunk.strip() for chunk in chunks if chunk.strip()]
+
+
+def _find_boundary(buffer: str, hard_lim: int, quoted: Optional[Callable[[str], bool]] = None) -> int:
+    # get the end index of the last complete sentence in the buffer, the formatting of the sentences before and after
+    # the end has to be independent: the next sentence does not start with an end mark and (with `quoted´)
+    # neither the sentence nor the (complete) first word of the next sentence contain quotation marks
+    end, start, first = 0, 0, 0
+    for match in SENTENCE_END.finditer(buffer):
+        # a sentence of punctuations is checked with the sentence before (a quotation mark is swapped across)
+        first = first if buffer[start] in _PUNCTUATIONS else start
+        sentence, start = buffer[first:match.end()], match.end()
+        if match.end() == len(buffer) or buffer[match.end()] in _END_MARKS:
+            continue
+        if quoted is not None:
+            # the first word of the next sentence has to be complete (a replaced mark like `<<´ can be cut)
+            word = _WORD.match(buffer, match.end())
+            if word is None or word.end() == len(buffer) or quoted(sentence) or quoted(word.group()):
+                continue
+        end = match.end()
+    if end == 0 and len(buffer) > hard_lim:
+        # a very long sentence is split at the last whitespace to bound the memory
+        end = max(buffer.rfind(' ', 0, hard_lim), buffer.rfind('\n', 0, hard_lim)) + 1
+        end = end if end > 0 else hard_lim
+    return end
+
+
+def read_sentence_chunks(source_path: str, offset: int = 0, chunk_chars: int = 50000,
+                         quoted: Optional[Callable[[str], bool]] = None) -> Iterator[Tuple[str, int]]:
+    """
+    Read the text file from the byte offset in chunks of complete sentences with about chunk_chars characters.
+    Yields the chunk and the byte offset of the end of the chunk in the file.
+    With the quotation mark check `quoted´ of the text formatting no quotation mark is next to the end of a chunk.
+    """
+
+    with open(file = source_path, mode = 'rb') as raw:
+        raw.seek(offset)
+        # newline = '' keeps the line endings, so the byte offset of every chunk is exact
+        file = io.TextIOWrapper(raw, encoding = 'utf-8', newline = '')
+        buffer = ''
+        while True:
+            block = file.read(chunk_chars)
+            buffer += block
+            end = _find_boundary(buffer, hard_lim = 2 * chunk_chars, quoted = quoted) if block else len(buffer)
+            if end:
+                chunk, buffer = buffer[:end], buffer[end:]
+                offset += len(chunk.encode('utf-8'))
+                yield chunk, offset
+            if not block:
+                return
+
+
+class Checkpoint(object):
+    """
+    The Checkpoint records the progress of a streaming decode: the byte offset of the last completed chunk in the
+    source file and the sizes of the partial output files. It is only valid for an unchanged source file.
+    """
+
+    def __init__(self, path: str, source_path: str):
+        """
+        :param path: path to the checkpoint file
+        :param source_path: path to the source text file
+        """
+
+        self.path = path
+        stat = os.stat(source_path)
+        self.source = {'size': stat.st_size, 'mtime': stat.st_mtime_ns}
+        self.offset = 0
+        self.sizes = dict()
+        # the bit mask of the quotation mark kinds with a pair opened before the offset
+        self.quotes = 0
+
+    def load(self) -> bool:
+        # load the checkpoint, returns if a valid checkpoint was found
+        if not os.path.isfile(self.path):
+            return False
+        with open(file = self.path, mode = 'r', encoding = 'utf-8') as file:
+            state = json.load(file)
+        if state.get('source') != self.source:
+            return False
+        self.offset = state['offset']
+        self.sizes = state['sizes']
+        self.quotes = state.get('quotes', 0)
+        return True
+
+    def save(self, offset: int, sizes: dict, quotes: int = 0):
+        self.offset = offset
+        self.sizes = sizes
+        self.quotes = quotes
+        # write the checkpoint atomically
+        with open(file = f'{self.path}.tmp', mode = 'w', encoding = 'utf-8') as file:
+            json.dump({'source': self.source, 'offset': offset, 'sizes': sizes, 'quotes': quotes}, file)
+        os.replace(f'{self.path}.tmp', self.path)
+
+    def remove(self):
+        if os.path.isfile(self.path):
+            os.remove(self.path)
+
+
+def open_partial(path: str, size: Optional[int]) -> io.TextIOWrapper:
+    # open a partial output file for appending, truncated to the size of the last checkpoint
+    file = open(file = path, mode = 'a+b')
+    file.truncate(size if size else 0)
+    file.seek(0, os.SEEK_END)
+    return io.TextIOWrapper(file, encoding = 'utf-8')
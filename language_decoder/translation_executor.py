@@ -0,0 +1,118 @@
+import time
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Callable, Iterable, List, Tuple, Any
+from .decode_metrics import NullMetrics, NULL_METRICS
+
+
+def get_translator_errors() -> Tuple[type, ...]:
+    # the throttling and connection errors of deep_translator, imported on the first failed request
+    from deep_translator.exceptions import RequestError, TooManyRequests
+    return TooManyRequests, RequestError
+
+
+class TokenBucket(object):
+    """
+    The TokenBucket limits the rate of translation requests shared by all threads.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        """
+        :param rate: number of requests per second
+        :param burst: number of requests which can be sent at once after idling
+        """
+
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._stamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._stamp) * self.rate)
+            self._stamp = now
+            # reserve a token, a negative amount of tokens is the waiting queue
+            self._tokens -= 1.
+            wait = -self._tokens / self.rate
+        if wait > 0.:
+            time.sleep(wait)
+
+
+class TranslationExecutor(object):
+    """
+    The TranslationExecutor runs translation calls in a thread pool with a limited number of requests in flight.
+    Every call passes a token bucket rate limit and is retried with exponential backoff and jitter on throttling errors.
+    """
+
+    def __init__(self,
+                 max_workers: int = 4,
+                 rate: Optional[float] = None,
+                 burst: int = 1,
+                 retries: int = 5,
+                 backoff: float = 1.,
+                 max_backoff: float = 60.,
+                 retry_on: Optional[Tuple[type, ...]] = None,
+                 metrics: Optional[NullMetrics] = None):
+
+        """
+        :param max_workers: maximal number of translation requests in flight
+        :param rate: maximal number of translation requests per second (None: unlimited)
+        :param burst: number of requests which can be sent at once after idling
+        :param retries: maximal number of retries of a failed translation request
+        :param backoff: the initial backoff in seconds, doubled on every retry
+        :param max_backoff: the maximal backoff in seconds
+        :param retry_on: the exceptions which trigger a retry (None: the throttling and connection errors of the translator)
+        :param metrics: the metrics registry counting the retries (None: no metrics)
+        """
+
+        self.max_workers = max_workers
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.retry_on = retry_on
+        self.metrics = metrics if metrics is not None else NULL_METRICS
+        self._bucket = TokenBucket(rate = rate, burst = burst) if rate else None
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _get_pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers = self.max_workers, thread_name_prefix = 'translator')
+            return self._pool
+
+    def _get_delay(self, attempt: int) -> float:
+        # exponential backoff with equal jitter
+        delay = min(self.max_backoff, self.backoff * 2 ** attempt)
+        return delay / 2 + random.uniform(0., delay / 2)
+
+    def call(self, func: Callable, *args, **kwargs) -> Any:
+        attempt = 0
+        while True:
+            if self._bucket is not None:
+                self._bucket.acquire()
+            try:
+                return func(*args, **kwargs)
+            # the except clause is only evaluated on an exception
+            except (self.retry_on if self.retry_on is not None else get_translator_errors()) as exception:
+                if attempt >= self.retries:
+                    raise
+                self.metrics.count('retries', type = type(exception).__name__)
+                time.sleep(self._get_delay(attempt))
+                attempt += 1
+
+    def map(self, func: Callable, items: Iterable) -> List:
+        # run the functions concurrently and return the results in order, the requests inside use `call´
+        items = list(items)
+        if self.max_workers <= 1 or len(items) <= 1:
+            return [func(item) for item in items]
+        return list(self._get_pool().map(func, items))
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
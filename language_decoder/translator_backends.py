@@ -0,0 +1,163 @@
+import json
+import time
+import random
+import threading
+from typing import Optional, List, Dict, Union, Callable
+from typing import Protocol, runtime_checkable
+
+
+@runtime_checkable
+class TranslatorBackend(Protocol):
+    """
+    The TranslatorBackend protocol is implemented by every translator used by the LanguageDecoder.
+    The deep_translator translators (e.g. GoogleTranslator) implement it as well.
+    """
+
+    def translate(self, text: str) -> str:
+        ...
+
+    def translate_batch(self, batch: List[str]) -> List[str]:
+        ...
+
+    def get_supported_languages(self, as_dict: bool = False) -> Union[List[str], Dict[str, str]]:
+        ...
+
+
+class DictionaryBackend(object):
+    """
+    The DictionaryBackend translates offline with a dictionary or a dictionary file.
+    A text is looked up line by line and word by word if the whole line is unknown, unknown words are kept.
+    """
+
+    def __init__(self,
+                 source: str = 'auto',
+                 target: str = 'en',
+                 dictionary: dict = None,
+                 path: str = None):
+
+        """
+        :param source: the translation source language
+        :param target: the translation target language
+        :param dictionary: a dictionary with the translations
+        :param path: path to a json file or a tab separated text file with the translations
+        """
+
+        self.source = source
+        self.target = target
+        self.dictionary = dict(dictionary) if isinstance(dictionary, dict) else dict()
+        if path is not None:
+            self.dictionary.update(self.load_dictionary(path = path))
+
+    @staticmethod
+    def load_dictionary(path: str) -> Dict[str, str]:
+        with open(file = path, mode = 'r', encoding = 'utf-8') as file:
+            if path.endswith('.json'):
+                return json.load(file)
+            # one translation per line: `source<tab>target´
+            return dict(line.rstrip('\n').split('\t', 1) for line in file if '\t' in line)
+
+    def _translate_line(self, line: str) -> str:
+        if line in self.dictionary:
+            return self.dictionary[line]
+        return ' '.join(self.dictionary.get(word, word) for word in line.split())
+
+    def translate(self, text: str) -> str:
+        return '\n'.join(self._translate_line(line) for line in text.split('\n'))
+
+    def translate_batch(self, batch: List[str]) -> List[str]:
+        return [self.translate(text) for text in batch]
+
+    def get_supported_languages(self, as_dict: bool = False) -> Union[List[str], Dict[str, str]]:
+        languages = {self.source: self.source, self.target: self.target}
+        return languages if as_dict else list(languages.keys())
+
+
+class FakeBackend(object):
+    """
+    The FakeBackend is a configurable stand-in for a network translator with simulated latency and errors.
+    It is deterministic for a given seed and used for load tests and benchmarks without network access.
+    """
+
+    def __init__(self,
+                 source: str = 'auto',
+                 target: str = 'en',
+                 latency: float = 0.,
+                 jitter: float = 0.,
+                 error_rate: float = 0.,
+                 throttle_rate: float = 0.,
+                 char_lim: int = 5000,
+                 transform: Callable[[str], str] = str.upper,
+                 seed: Optional[int] = None):
+
+        """
+        :param source: the translation source language
+        :param target: the translation target language
+        :param latency: simulated latency of one request in seconds
+        :param jitter: maximal random latency added to one request in seconds
+        :param error_rate: probability of a request to fail with a `RequestError´
+        :param throttle_rate: probability of a request to fail with a `TooManyRequests´
+        :param char_lim: character limit of one request
+        :param transform: the function used to "translate" a text
+        :param seed: seed of the random generator
+        """
+
+        self.source = source
+        self.target = target
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.char_lim = char_lim
+        self.transform = transform
+        self.requests = 0
+        self.chars = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def translate(self, text: str) -> str:
+        with self._lock:
+            self.requests += 1
+            self.chars += len(text)
+            delay = self.latency + self._random.uniform(0., self.jitter)
+            failure = self._random.random()
+        if delay > 0.:
+            time.sleep(delay)
+        if len(text) > self.char_lim or failure < self.throttle_rate + self.error_rate:
+            # the translator errors are imported on the first simulated failure
+            from deep_translator.exceptions import RequestError, TooManyRequests
+            if len(text) > self.char_lim:
+                raise RequestError(f'Text exceeds the character limit of {self.char_lim}.')
+            if failure < self.throttle_rate:
+                raise TooManyRequests()
+            raise RequestError()
+        return self.transform(text)
+
+    def translate_batch(self, batch: List[str]) -> List[str]:
+        return [self.translate(text) for text in batch]
+
+    def get_supported_languages(self, as_dict: bool = False) -> Union[List[str], Dict[str, str]]:
+        languages = {self.source: self.source, self.target: self.target}
+        return languages if as_dict else list(languages.keys())
+
+
+# the names of the translator backends of `get_backend´
+BACKENDS = ('google', 'dictionary', 'fake')
+
+
+def get_backend(backend: Union[str, TranslatorBackend] = 'google',
+                source: str = 'auto',
+                target: str = 'en',
+                **kwargs) -> TranslatorBackend:
+    # get a translator backend by name, backend instances are returned unchanged
+    if not isinstance(backend, str):
+        if not isinstance(backend, TranslatorBackend):
+            raise TypeError('Error in `get_backend´. Backend does not implement `TranslatorBackend´.')
+        return backend
+    if backend == 'google':
+        from deep_translator import GoogleTranslator
+        return GoogleTranslator(source = source, target = target, **kwargs)
+    if backend == 'dictionary':
+        return DictionaryBackend(source = source, target = target, **kwargs)
+    if backend == 'fake':
+        return FakeBackend(source = source, target = target, **kwargs)
+    raise ValueError(f'Error in `get_backend´. Unknown translator backend `{backend}´.')
@@ -0,0 +1,129 @@
+import sqlite3
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Optional, Dict, Iterable
+from .text_normalizer import BEG_MARKS, END_MARKS, QUO_MARKS
+
+
+class WordCache(object):
+    """
+    The WordCache stores word translations keyed on (source language, target language, normalized word).
+    It consists of a small in-memory LRU tier in front of a size bounded SQLite table with LRU eviction.
+    Without a path the SQLite table is kept in memory and nothing is persisted between runs.
+    """
+
+    def __init__(self,
+                 path: Optional[str] = None,
+                 max_size: int = 1000000,
+                 memory_size: int = 50000):
+
+        """
+        :param path: path to the SQLite cache file (None: in-memory only)
+        :param max_size: maximal number of cached words on disk, least recently used words are evicted
+        :param memory_size: maximal number of cached words in the in-memory tier
+        """
+
+        self.path = path if path else ':memory:'
+        self.max_size = max_size
+        self.memory_size = memory_size
+        self.hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+        self._lock = threading.RLock()
+        self._connection = sqlite3.connect(self.path, check_same_thread = False)
+        self._connection.execute('CREATE TABLE IF NOT EXISTS words (source TEXT, target TEXT, word TEXT, decode TEXT, '
+                                 'used INTEGER, PRIMARY KEY (source, target, word))')
+        self._connection.execute('CREATE INDEX IF NOT EXISTS words_used ON words (used)')
+        self._connection.commit()
+        self._size, self._clock = self._connection.execute('SELECT COUNT(*), COALESCE(MAX(used), 0) FROM words').fetchone()
+
+    def __len__(self) -> int:
+        return self._size
+
+    @staticmethod
+    def normalize(word: str) -> str:
+        # remove the marks around the word, they are added again by `LanguageDecoder._add_missing_marks´
+        normalized = unicodedata.normalize('NFC', word).lstrip(BEG_MARKS + QUO_MARKS).rstrip(END_MARKS + QUO_MARKS)
+        return normalized if normalized else word
+
+    def get_many(self, source: str, target: str, words: Iterable[str]) -> Dict[str, str]:
+        words = list(dict.fromkeys(words))
+        found = dict()
+        with self._lock:
+            missing = list()
+            for word in words:
+                key = (source, target, word)
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    found[word] = self._memory[key]
+                else:
+                    missing.append(word)
+            # look up the words missing in the memory tier on disk in chunks (SQLite variable limit)
+            for i in range(0, len(missing), 500):
+                chunk = missing[i:i + 500]
+                rows = self._connection.execute(f'SELECT word, decode FROM words WHERE source = ? AND target = ? AND '
+                                                f'word IN ({",".join("?" * len(chunk))})', (source, target, *chunk))
+                disk = dict(rows.fetchall())
+                self._remember(source, target, disk)
+                found.update(disk)
+            # the words served from memory are used on disk too, so the disk eviction stays least recently used
+            if found:
+                self._clock += 1
+                self._connection.executemany('UPDATE words SET used = ? WHERE source = ? AND target = ? AND word = ?',
+                                             [(self._clock, source, target, word) for word in found])
+                self._connection.commit()
+            self.hits += len(found)
+            self.misses += len(words) - len(found)
+        return found
+
+    def set_many(self, source: str, target: str, translations: Dict[str, str]):
+        if not translations:
+            return
+        with self._lock:
+            self._clock += 1
+            self._connection.executemany('INSERT OR REPLACE INTO words VALUES (?, ?, ?, ?, ?)',
+                                         [(source, target, word, decode, self._clock)
+                                          for word, decode in translations.items()])
+            self._size = self._connection.execute('SELECT COUNT(*) FROM words').fetchone()[0]
+            self._evict()
+            self._connection.commit()
+            self._remember(source, target, translations)
+
+    def get(self, source: str, target: str, word: str) -> Optional[str]:
+        return self.get_many(source = source, target = target, words = [word]).get(word)
+
+    def set(self, source: str, target: str, word: str, decode: str):
+        self.set_many(source = source, target = target, translations = {word: decode})
+
+    def _remember(self, source: str, target: str, translations: Dict[str, str]):
+        # add translations to the in-memory tier and drop the least recently used ones
+        for word, decode in translations.items():
+            self._memory[(source, target, word)] = decode
+            self._memory.move_to_end((source, target, word))
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last = False)
+
+    def _evict(self):
+        # delete the least recently used words on disk
+        overflow = self._size - self.max_size
+        if overflow > 0:
+            self._connection.execute('DELETE FROM words WHERE rowid IN (SELECT rowid FROM words ORDER BY used LIMIT ?)',
+                                     (overflow,))
+            self._size -= overflow
+
+    def stats(self) -> dict:
+        requests = self.hits + self.misses
+        return {'hits': self.hits, 'misses': self.misses, 'hit_rate': self.hits / requests if requests else 0.,
+                'size': self._size, 'memory_size': len(self._memory)}
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self._connection.execute('DELETE FROM words')
+            self._connection.commit()
+            self._size = 0
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
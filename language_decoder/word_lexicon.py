@@ -0,0 +1,181 @@
+import re
+import json
+import sqlite3
+import threading
+from typing import Optional, Dict, Iterable, List, Tuple
+from .word_cache import WordCache
+
+_WORD = re.compile(r'\S+')
+
+
+def split_decode_line(source_line: str, decode_line: str, count: int) -> Optional[List[str]]:
+    # split an edited decode line into the decode words of the `count´ source words of the line
+    decode_words = decode_line.split()
+    if len(decode_words) == count:
+        return decode_words
+    # a decode word with whitespaces (e.g. 'Ich bin') starts in the column of its source word
+    starts = [match.start() for match in _WORD.finditer(source_line)]
+    if len(starts) != count:
+        return
+    decode_words = list()
+    for start, end in zip(starts, starts[1:] + [None]):
+        if 0 < start < len(decode_line) and not decode_line[start - 1].isspace():
+            # a decode word crosses the column of the next source word
+            return
+        decode_words.append(decode_line[start:end].strip())
+    return decode_words
+
+
+def align_decode_file(decode_path: str, source_words: List[str]) -> Optional[List[Optional[str]]]:
+    # get the decode words of an edited decode file aligned to the source words, the words of a line which
+    # can not be split are None, None if the source words of the decode file differ
+    with open(file = decode_path, mode = 'r', encoding = 'utf-8') as file:
+        lines = file.read().split('\n')
+    aligned = list()
+    for l in range(0, len(lines), 3):  # noqa
+        line_words = lines[l].split()
+        if not line_words:
+            continue
+        if source_words[len(aligned):len(aligned) + len(line_words)] != line_words:
+            return
+        decode_line = lines[l + 1] if l + 1 < len(lines) else ''
+        decode_words = split_decode_line(lines[l], decode_line, count = len(line_words))
+        if decode_words is None or not all(decode_words):
+            decode_words = [None] * len(line_words)
+        aligned += decode_words
+    return aligned if len(aligned) == len(source_words) else None
+
+
+def diff_decode_file(decode_path: str, machine_pairs: Iterable[Tuple[str, str]]) -> Optional[List[Tuple[str, str]]]:
+    # get the (source word, corrected decode word) pairs of an edited decode file compared to the machine output,
+    # None if the decode file is not aligned to the machine output anymore
+    machine_pairs = list(machine_pairs)
+    decode_words = align_decode_file(decode_path, source_words = [source_word for source_word, _ in machine_pairs])
+    if decode_words is None:
+        return
+    return [(source_word, decode_word) for (source_word, machine_word), decode_word in zip(machine_pairs, decode_words)
+            if decode_word is not None and decode_word != machine_word]
+
+
+class WordLexicon(object):
+    """
+    The WordLexicon stores the word corrections of manually checked decode files keyed on
+    (source language, target language, normalized word). Every correction is counted,
+    the most frequent correction of a word is used before any translation request.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        :param path: path to the SQLite lexicon file (None: in-memory only)
+        """
+
+        self.path = path if path else ':memory:'
+        self._lock = threading.RLock()
+        self._connection = sqlite3.connect(self.path, check_same_thread = False, timeout = 30.)
+        self._connection.execute('CREATE TABLE IF NOT EXISTS lexicon (source TEXT, target TEXT, word TEXT, decode TEXT, '
+                                 'count INTEGER, PRIMARY KEY (source, target, word, decode))')
+        # the corrections learned of every machine output (sidecar hash), a further edit of the decode file
+        # replaces the corrections of its former harvest
+        self._connection.execute('CREATE TABLE IF NOT EXISTS harvests (machine TEXT PRIMARY KEY, decode TEXT, '
+                                 'corrections TEXT)')
+        self._connection.commit()
+        self._size = self._connection.execute('SELECT COUNT(*) FROM lexicon').fetchone()[0]
+
+    def __len__(self) -> int:
+        return self._size
+
+    @staticmethod
+    def normalize(word: str) -> str:
+        return WordCache.normalize(word)
+
+    def get_many(self, source: str, target: str, words: Iterable[str]) -> Dict[str, str]:
+        # get the learned decode words, a capitalized word falls back to the correction of the lowercase word
+        words = list(dict.fromkeys(words))
+        keys = list(dict.fromkeys(words + [word.lower() for word in words]))
+        learned = dict()
+        with self._lock:
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                # the most frequent correction is the last one
+                rows = self._connection.execute(f'SELECT word, decode FROM lexicon WHERE source = ? AND target = ? AND '
+                                                f'word IN ({",".join("?" * len(chunk))}) ORDER BY count, rowid',
+                                                (source, target, *chunk))
+                learned.update(rows.fetchall())
+        found = dict()
+        for word in words:
+            if word in learned:
+                found[word] = learned[word]
+            elif word.lower() in learned and word[:1].isupper():
+                decode = learned[word.lower()]
+                found[word] = decode[:1].upper() + decode[1:]
+        return found
+
+    def _count(self, source: str, target: str, corrections: Iterable[Tuple[str, str]]) -> Dict[Tuple[str, ...], int]:
+        # count the (source word, decode word) corrections, the marks around the words are not learned
+        counts = dict()
+        for source_word, decode_word in corrections:
+            key = source, target, self.normalize(source_word), self.normalize(decode_word)
+            if key[3].strip():
+                counts[key] = counts.get(key, 0) + 1
+        return counts
+
+    def _add(self, counts: Dict[Tuple[str, ...], int]):
+        # add the counts of the corrections (called with the lock), corrections without count are removed
+        self._connection.executemany('INSERT INTO lexicon VALUES (?, ?, ?, ?, ?) ON CONFLICT '
+                                     '(source, target, word, decode) DO UPDATE SET count = count + excluded.count',
+                                     [(*key, count) for key, count in counts.items()])
+        self._connection.execute('DELETE FROM lexicon WHERE count <= 0')
+        self._size = self._connection.execute('SELECT COUNT(*) FROM lexicon').fetchone()[0]
+
+    def learn(self, source: str, target: str, corrections: Iterable[Tuple[str, str]]) -> int:
+        counts = self._count(source = source, target = target, corrections = corrections)
+        if not counts:
+            return 0
+        with self._lock:
+            self._add(counts)
+            self._connection.commit()
+        return len(counts)
+
+    def is_harvested(self, machine_sha256: str, decode_sha256: str) -> bool:
+        # the decode file of the machine output is already learned in this version
+        with self._lock:
+            row = self._connection.execute('SELECT decode FROM harvests WHERE machine = ?', (machine_sha256,)).fetchone()
+        return row is not None and row[0] == decode_sha256
+
+    def harvest(self, source: str, target: str, corrections: Iterable[Tuple[str, str]], machine_sha256: str,
+                decode_sha256: str) -> int:
+        # learn the corrections of a decode file compared to its machine output, the corrections of a former
+        # version of the decode file are replaced (a book is counted once however often it is edited)
+        counts = self._count(source = source, target = target, corrections = corrections)
+        with self._lock:
+            row = self._connection.execute('SELECT decode, corrections FROM harvests WHERE machine = ?',
+                                           (machine_sha256,)).fetchone()
+            if row is not None and row[0] == decode_sha256:
+                return 0
+            changes = dict(counts)
+            for *key, count in (json.loads(row[1]) if row is not None else list()):
+                changes[tuple(key)] = changes.get(tuple(key), 0) - count
+            self._add({key: count for key, count in changes.items() if count})
+            self._connection.execute('INSERT OR REPLACE INTO harvests VALUES (?, ?, ?)',
+                                     (machine_sha256, decode_sha256,
+                                      json.dumps([[*key, count] for key, count in counts.items()], ensure_ascii = False)))
+            self._connection.commit()
+        return len(counts)
+
+    def stats(self) -> dict:
+        with self._lock:
+            words = self._connection.execute('SELECT COUNT(*) FROM (SELECT DISTINCT source, target, word FROM lexicon)'
+                                             ).fetchone()[0]
+            files = self._connection.execute('SELECT COUNT(*) FROM harvests').fetchone()[0]
+        return {'corrections': self._size, 'words': words, 'files': files}
+
+    def clear(self):
+        with self._lock:
+            self._connection.execute('DELETE FROM lexicon')
+            self._connection.execute('DELETE FROM harvests')
+            self._connection.commit()
+            self._size = 0
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
@@ -0,0 +1,31 @@
+from typing import Optional, List, Iterator
+
+
+def pack_words(words: List[str], char_lim: int = 4500, delimiter: str = '\n') -> Iterator[List[str]]:
+    # pack the words into delimiter-separated payloads up to the character limit of the provider
+    payload = list()
+    payload_len = 0
+    for word in words:
+        word_len = len(word) + len(delimiter)
+        if payload and payload_len + word_len - len(delimiter) > char_lim:
+            yield payload
+            payload = list()
+            payload_len = 0
+        payload.append(word)
+        payload_len += word_len
+    if payload:
+        yield payload
+
+
+def join_payload(words: List[str], delimiter: str = '\n') -> str:
+    return delimiter.join(words)
+
+
+def split_payload(text: Optional[str], count: int, delimiter: str = '\n') -> Optional[List[str]]:
+    # split the translated payload back into aligned per-word results, None if the split count does not match
+    if not isinstance(text, str):
+        return
+    words = [word.strip() for word in text.strip().split(delimiter)]
+    if len(words) != count or not all(words):
+        return
+    return words
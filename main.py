@@ -1,18 +1,15 @@
 import os
-from glob import glob
-from language_decoder.language_decoder import LanguageDecoder
+from language_decoder.corpus_pipeline import CorpusRunner
 from language_decoder.dictionaries import REPLACEMENTS, RU2DE
 
-# Initialise language decoder.
-language_decoder = LanguageDecoder(source_language = 'ru', target_language = 'de',
-                                   replace_dict = REPLACEMENTS, dictionary = RU2DE)
-base_path = 'C:/Users/User/source/'
-directories = glob(os.path.join(base_path, '**/*/'), recursive = True)
-for directory in directories:
-    text_files = glob(os.path.join(directory, '*.txt'))
-    for text_file in text_files:
-        if not text_file.endswith('transl.txt') and not text_file.endswith('decode.txt'):
-            language_decoder.decode_text(source_path = text_file, translate_text = True)
-        if text_file.endswith('decode.txt'):
-            language_decoder.convert2pdf(decode_path = text_file)
-            # language_decoder.delete_decoded_files(decode_path=text_file)
+if __name__ == '__main__':
+    base_path = 'C:/Users/User/source/'
+    # Initialise corpus runner with the language decoder parameters, a persistent word translation cache
+    # and a lexicon of the manual corrections learned from the checked decoded text files.
+    decoder_kwargs = dict(source_language = 'ru', target_language = 'de', replace_dict = REPLACEMENTS, dictionary = RU2DE,
+                          cache_path = os.path.join(base_path, 'word_cache.sqlite'),
+                          lexicon_path = os.path.join(base_path, 'word_lexicon.sqlite'), pack_words = True)
+    corpus_runner = CorpusRunner(decoder_kwargs = decoder_kwargs, translate_text = True)
+    # Decode the new text files and convert the (manually checked) decoded text files to pdf.
+    for status in corpus_runner.run(base_path = base_path):
+        print(f'{status.stage}: {status.status} `{status.path}´ {status.error if status.error else ""}')
@@ -0,0 +1,22 @@
+import os
+from language_decoder.corpus_pipeline import CorpusRunner
+
+
+def test_corrections_are_learned_by_the_runner(tmp_path):
+    # the rendering workers have no lexicon file, the corrections are learned before the rendering
+    source_path = os.path.join(tmp_path, 'text.txt')
+    with open(file = source_path, mode = 'w', encoding = 'utf-8') as file:
+        file.write('дома один два.')
+    runner = CorpusRunner(decoder_kwargs = {'source_language': 'ru', 'target_language': 'de', 'backend': 'fake'},
+                          render_workers = 1)
+    assert sorted((status.stage, status.status) for status in runner.run(base_path = str(tmp_path))) == [
+        ('decode', 'done')]
+    decode_path = os.path.join(tmp_path, 'text_decode.txt')
+    with open(file = decode_path, mode = 'r', encoding = 'utf-8') as file:
+        decode_text = file.read()
+    with open(file = decode_path, mode = 'w', encoding = 'utf-8') as file:
+        file.write(decode_text.replace('ОДИН', 'eins'))
+
+    assert sorted((status.stage, status.status) for status in runner.run(base_path = str(tmp_path))) == [
+        ('decode', 'skipped'), ('render', 'done')]
+    assert runner._decoder._lexicon.get_many('ru', 'de', ['один']) == {'один': 'eins'}
@@ -0,0 +1,17 @@
+from language_decoder.decode_metrics import MetricsRegistry
+
+
+def test_prometheus_values_are_exact():
+    # `{value:g}´ wrote 1234567 as 1.23457e+06
+    metrics = MetricsRegistry(prefix = 'test')
+    metrics.count('words', 1234567)
+    metrics.count('seconds', 1234567.25)
+    metrics.count('ratio', 0.1)
+    for _ in range(3):
+        with metrics.stage('translate'):
+            pass
+    lines = metrics.to_prometheus().splitlines()
+    assert 'test_words_total 1234567' in lines
+    assert 'test_seconds_total 1234567.25' in lines
+    assert 'test_ratio_total 0.1' in lines
+    assert 'test_stage_seconds_count{stage="translate"} 3' in lines
@@ -0,0 +1,55 @@
+import os
+import json
+import threading
+import urllib.error
+import urllib.request
+import pytest
+from language_decoder.decode_service import DecodeService, serve
+from language_decoder.translator_backends import FakeBackend
+
+
+@pytest.fixture
+def library(tmp_path):
+    root = os.path.join(tmp_path, 'library')
+    os.makedirs(root)
+    for path in [os.path.join(root, 'text.txt'), os.path.join(root, 'text.md'), os.path.join(tmp_path, 'other.txt')]:
+        with open(file = path, mode = 'w', encoding = 'utf-8') as file:
+            file.write('дома один два.')
+    service = DecodeService(decoder_kwargs = {'backend': FakeBackend(source = 'ru', target = 'de')}, root = root)
+    yield root, service
+    service.shutdown()
+
+
+def test_submit_only_text_files_of_the_library(library):
+    root, service = library
+    with pytest.raises(PermissionError):
+        service.submit(path = os.path.join(root, '..', 'other.txt'))
+    with pytest.raises(ValueError):
+        service.submit(path = os.path.join(root, 'text.md'))
+    job = service.submit(path = os.path.join(root, 'text.txt'))
+    assert job.wait(timeout = 10) and job.status == 'done'
+    with pytest.raises(ValueError):
+        service.submit(path = job.result['decode_path'])
+    job = service.submit(path = job.result['decode_path'], kind = 'pdf')
+    assert job.wait(timeout = 10) and job.status == 'done'
+    # the path locks of the finished jobs are dropped
+    assert service._path_locks == dict()
+
+
+def test_post_jobs_requires_json(library):
+    root, service = library
+    server = serve(service = service, port = 0)
+    threading.Thread(target = server.serve_forever, daemon = True).start()
+    url = f'http://127.0.0.1:{server.server_address[1]}/jobs'
+    body = json.dumps({'path': os.path.join(root, 'text.txt')}).encode('utf-8')
+    try:
+        for content_type, code in [('text/plain', 415), ('application/json; charset=utf-8', 202)]:
+            request = urllib.request.Request(url, data = body, headers = {'Content-Type': content_type})
+            try:
+                with urllib.request.urlopen(request) as response:
+                    assert response.status == code
+            except urllib.error.HTTPError as error:
+                assert error.code == code
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,120 @@
+import os
+import pytest
+from benchmarks.synthetic_corpus import CorpusGenerator
+from language_decoder.aligned_sidecar import load_aligned_pairs
+from language_decoder.dictionaries import REPLACEMENTS
+from language_decoder.decode_manifest import DecodeManifest, get_manifest_path
+from language_decoder.language_decoder import LanguageDecoder
+from language_decoder.translator_backends import FakeBackend
+
+WORDS = {'дома': 'zu Hause', 'один': 'eins', 'два': 'zwei', 'три': 'drei', 'четыре': 'vier', 'пять': 'fünf'}
+
+
+def _translate(text: str) -> str:
+    # the packed words are separated by new lines
+    return '\n'.join(WORDS.get(word, word) for word in text.split('\n'))
+
+
+def _get_decoder() -> LanguageDecoder:
+    return LanguageDecoder(source_language = 'ru', target_language = 'de', pack_words = True,
+                           backend = FakeBackend(source = 'ru', target = 'de', transform = _translate))
+
+
+def test_decode_text(tmp_path):
+    source_path = os.path.join(tmp_path, 'text.txt')
+    with open(file = source_path, mode = 'w', encoding = 'utf-8') as file:
+        file.write('дома один два. три четыре.')
+    decode_path = _get_decoder().decode_text(source_path = source_path)
+    assert list(load_aligned_pairs(decode_path = decode_path)) == [
+        ('дома', 'zu Hause'), ('один', 'eins'), ('два.', 'zwei.'), ('три', 'drei'), ('четыре.', 'vier.')]
+
+
+def test_manual_changes_are_kept_on_redecode(tmp_path):
+    # a decode word with a whitespace must not shift the manual changes of the following words
+    source_path = os.path.join(tmp_path, 'text.txt')
+    with open(file = source_path, mode = 'w', encoding = 'utf-8') as file:
+        file.write('дома один два. три четыре.')
+    decode_path = _get_decoder().decode_text(source_path = source_path)
+    with open(file = decode_path, mode = 'r', encoding = 'utf-8') as file:
+        decode_text = file.read()
+    with open(file = decode_path, mode = 'w', encoding = 'utf-8') as file:
+        file.write(decode_text.replace('vier', 'VIER'))
+    with open(file = source_path, mode = 'a', encoding = 'utf-8') as file:
+        file.write(' пять.')
+
+    assert _get_decoder().decode_text(source_path = source_path) == decode_path
+    expected = [('дома', 'zu Hause'), ('один', 'eins'), ('два.', 'zwei.'), ('три', 'drei'), ('четыре.', 'VIER.'),
+                ('пять.', 'fünf.')]
+    assert list(load_aligned_pairs(decode_path = decode_path)) == expected
+    manifest = DecodeManifest(path = get_manifest_path(decode_path = decode_path), source_language = 'ru',
+                              target_language = 'de')
+    assert manifest.load() and manifest.get_pairs() == expected
+
+
+def test_unaligned_manual_changes_are_replaced(tmp_path):
+    source_path = os.path.join(tmp_path, 'text.txt')
+    with open(file = source_path, mode = 'w', encoding = 'utf-8') as file:
+        file.write('дома один два. три четыре.')
+    decode_path = _get_decoder().decode_text(source_path = source_path)
+    with open(file = decode_path, mode = 'r', encoding = 'utf-8') as file:
+        lines = file.read().split('\n')
+    # the decode words cross the columns of their source words
+    lines[1] = ' '.join(lines[1].split())
+    with open(file = decode_path, mode = 'w', encoding = 'utf-8') as file:
+        file.write('\n'.join(lines))
+    with open(file = source_path, mode = 'a', encoding = 'utf-8') as file:
+        file.write(' пять.')
+
+    _get_decoder().decode_text(source_path = source_path)
+    assert list(load_aligned_pairs(decode_path = decode_path)) == [
+        ('дома', 'zu Hause'), ('один', 'eins'), ('два.', 'zwei.'), ('три', 'drei'), ('четыре.', 'vier.'),
+        ('пять.', 'fünf.')]
+
+
+
+def test_redecode_marks_pdf_stale(tmp_path):
+    # the decoding leaves the pdf of the former decode text to the caller (one writer of the pdf)
+    source_path = os.path.join(tmp_path, 'text.txt')
+    with open(file = source_path, mode = 'w', encoding = 'utf-8') as file:
+        file.write('дома один два.')
+    decoder = _get_decoder()
+    decode_path = decoder.decode_text(source_path = source_path)
+    pdf_path = decoder.convert2pdf(decode_path = decode_path)
+    # the pdf is dated back to the decode text file
+    mtime_ns = os.stat(decode_path).st_mtime_ns
+    os.utime(pdf_path, ns = (mtime_ns, mtime_ns))
+    assert not decoder.is_pdf_stale(decode_path = decode_path)
+    with open(file = source_path, mode = 'w', encoding = 'utf-8') as file:
+        file.write('дома один два. три четыре.')
+    assert decoder.decode_text(source_path = source_path) == decode_path
+    assert os.stat(pdf_path).st_mtime_ns == mtime_ns
+    assert decoder.is_pdf_stale(decode_path = decode_path)
+    assert decoder.convert2pdf(decode_path = decode_path) is None
+    assert decoder.convert2pdf(decode_path = decode_path, update = True) == pdf_path
+    assert not decoder.is_pdf_stale(decode_path = decode_path)
+
+@pytest.mark.parametrize('script', ['cyrillic', 'latin'])
+def test_stream_decode_equals_decode(tmp_path, script):
+    # the chunks of the streaming decode are formatted as the whole text (quotation mark pairs, final punctuation)
+    text = CorpusGenerator(script = script, seed = 1).generate(size = 64 << 10)
+    paths = list()
+    for name in ['plain', 'stream']:
+        os.makedirs(os.path.join(tmp_path, name))
+        paths.append(os.path.join(tmp_path, name, 'text.txt'))
+        with open(file = paths[-1], mode = 'w', encoding = 'utf-8') as file:
+            file.write(text)
+    decoder = LanguageDecoder(source_language = 'ru', target_language = 'de', replace_dict = REPLACEMENTS,
+                              backend = FakeBackend(source = 'ru', target = 'de'), pack_words = True)
+    plain_path = decoder.decode_text(source_path = paths[0])
+    stream_path = decoder._decode_text_stream(source_path = paths[1], chunk_chars = 2000)
+    assert list(load_aligned_pairs(decode_path = stream_path)) == list(load_aligned_pairs(decode_path = plain_path))
+
+
+def test_translator_backend_is_created_on_first_use():
+    # the google backend loads deep_translator, which the pdf rendering does not need
+    decoder = LanguageDecoder(backend = 'google')
+    assert decoder._backend is None
+    decoder = LanguageDecoder(backend = 'fake', backend_options = {'transform': str.lower})
+    assert decoder._backend is None and decoder.translate('DOMA') == 'doma'
+    with pytest.raises(ValueError):
+        LanguageDecoder(backend = 'unknown')
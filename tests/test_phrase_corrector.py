@@ -0,0 +1,23 @@
+from language_decoder.dictionaries import RU2DE
+from language_decoder.phrase_corrector import PhraseCorrector
+
+
+def test_single_word_tokens():
+    corrector = PhraseCorrector(RU2DE)
+    assert corrector.correct(['Tat', 'Zu', None, '']) == ['machte', 'zu', None, '']
+
+
+def test_phrases_in_multi_word_tokens():
+    corrector = PhraseCorrector({'Ich bin': 'Ich', 'Tat': 'machte', 'pro': 'für', 'Zu': 'zu'})
+    assert corrector.correct(['Ich bin', 'und Ich bin']) == ['Ich', 'und Ich']
+
+
+def test_single_word_keys_not_applied_inside_multi_word_tokens():
+    # the single word corrections are only applied to whole one-word tokens
+    corrector = PhraseCorrector(RU2DE)
+    assert corrector.correct(['In der Tat', 'pro Jahr', 'Zu Hause']) == ['In der Tat', 'pro Jahr', 'Zu Hause']
+
+
+def test_phrase_matching_a_whole_token():
+    corrector = PhraseCorrector({'Zu Hause': 'daheim', 'Hause': 'Haus'})
+    assert corrector.correct(['Zu Hause', 'im Hause']) == ['daheim', 'im Hause']
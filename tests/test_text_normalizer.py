@@ -0,0 +1,32 @@
+import os
+import pytest
+from benchmarks.synthetic_corpus import CorpusGenerator
+from language_decoder.dictionaries import REPLACEMENTS
+from language_decoder.text_normalizer import TextNormalizer
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), 'data')
+
+
+@pytest.mark.parametrize('script', ['cyrillic', 'latin'])
+def test_normalize_golden_corpus(script):
+    # the expected output was written by the former `LanguageDecoder.text_formatting´ (regex passes per call)
+    text = CorpusGenerator(script = script, seed = 0).generate(size = 8 << 10)
+    with open(file = os.path.join(DATA_DIR, f'normalizer_{script}.txt'), mode = 'r', encoding = 'utf-8') as file:
+        expected = file.read().rstrip('\n')
+    assert TextNormalizer(replace_dict = REPLACEMENTS).normalize(text) == expected
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('„Привет“, сказал он.', '„Привет", сказал он.'),
+    ('Er sagte: „Ja!“ und ging', 'Er sagte: „Ja! " und ging.'),
+    ('«Da»  , sagte er', '"Da" , sagte er.'),
+    ('<<Zitat>> - Ende — Anfang', '"Zitat" - Ende - Anfang.'),
+    ("' einfach ' und ` schief ´", "'einfach' und `schief´ ."),
+    ('Frage " ? " und Ende', 'Frage? "" und Ende.'),
+    ('camelCase undAnother wordHere', 'camel. Case und. Another word. Here.'),
+    ('ДомаБыл он', 'Дома. Был он.'),
+    ('Klammern( mit ) Leerzeichen [ eckig ]und {geschweift}', 'Klammern (mit) Leerzeichen [eckig] und {geschweift} .'),
+    ('Preis ( 5 % ) , Ende', 'Preis (5% ) , Ende.'),
+])
+def test_normalize_marks(text, expected):
+    assert TextNormalizer(replace_dict = REPLACEMENTS).normalize(text) == expected
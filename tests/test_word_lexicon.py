@@ -0,0 +1,21 @@
+from language_decoder.word_lexicon import WordLexicon
+
+
+def test_most_frequent_correction():
+    lexicon = WordLexicon()
+    lexicon.learn('ru', 'de', [('дома', 'daheim'), ('дома', 'zu Hause'), ('дома,', 'zu Hause,')])
+    assert lexicon.get_many('ru', 'de', ['дома', 'Дома', 'один']) == {'дома': 'zu Hause', 'Дома': 'Zu Hause'}
+
+
+def test_harvest_replaces_former_version():
+    # every edit of a decode file replaces the corrections of its former version
+    lexicon = WordLexicon()
+    assert lexicon.harvest('ru', 'de', [('дома', 'daheim')], machine_sha256 = 'a', decode_sha256 = '1') == 1
+    assert lexicon.is_harvested(machine_sha256 = 'a', decode_sha256 = '1')
+    assert lexicon.harvest('ru', 'de', [('дома', 'daheim')], machine_sha256 = 'a', decode_sha256 = '1') == 0
+    lexicon.harvest('ru', 'de', [('дома', 'daheim'), ('три', 'DREI')], machine_sha256 = 'a', decode_sha256 = '2')
+    lexicon.learn('ru', 'de', [('дома', 'zu Hause'), ('дома', 'zu Hause')])
+    assert lexicon.get_many('ru', 'de', ['дома', 'три']) == {'дома': 'zu Hause', 'три': 'DREI'}
+    lexicon.harvest('ru', 'de', [], machine_sha256 = 'a', decode_sha256 = '3')
+    assert lexicon.get_many('ru', 'de', ['три']) == dict()
+    assert lexicon.stats() == {'corrections': 1, 'words': 1, 'files': 1}